@@ -6,7 +6,23 @@ import time
 from typing import Dict, Any, Callable, Optional, Final
 from loguru import logger
 from chatagentcore.adapters.base import BaseAdapter, Message
-from chatagentcore.adapters.dingtalk.client import DingTalkClientSDK, HAS_SDK
+from chatagentcore.adapters.dingtalk.client import DingTalkClientSDK, HAS_SDK, HAS_UVLOOP
+
+
+def _extract_text(ding_msg: Any) -> str:
+    return ding_msg.text.content if ding_msg.text else ""
+
+
+def _extract_rich_text(ding_msg: Any) -> str:
+    texts = ding_msg.get_text_list()
+    return "".join(texts) if texts else "[富文本]"
+
+
+# 按 message_type 分发的文本提取函数，未登记的类型回退为 "[类型]" 占位
+_TEXT_EXTRACTORS: Final[Dict[str, Callable[[Any], str]]] = {
+    "text": _extract_text,
+    "richText": _extract_rich_text,
+}
 
 
 class DingTalkAdapter(BaseAdapter):
@@ -20,14 +36,18 @@ class DingTalkAdapter(BaseAdapter):
             config: 平台配置
                 - client_id: 钉钉应用 AppKey
                 - client_secret: 钉钉应用 AppSecret
+                - use_uvloop: 是否使用 uvloop 事件循环，默认 False
         """
         super().__init__(config)
 
         self.client_id = config.get("client_id") or config.get("app_key", "")
         self.client_secret = config.get("client_secret") or config.get("app_secret", "")
-        
+        self._use_uvloop = bool(config.get("use_uvloop", False))
+
         # 事件处理器
         self._message_handler: Optional[Callable] = None
+        # 处理器是否为协程函数，在注册时计算一次，避免每条消息重复反射检查
+        self._message_handler_is_coro: bool = False
 
         # 客户端
         self._client: Optional[DingTalkClientSDK] = None
@@ -44,6 +64,13 @@ class DingTalkAdapter(BaseAdapter):
 
         logger.info("初始化钉钉适配器 (Stream Mode)...")
 
+        # uvloop 只用于长连接线程自己的事件循环（由客户端创建），不修改全局策略
+        if self._use_uvloop:
+            if HAS_UVLOOP:
+                logger.info("长连接线程启用 uvloop 事件循环")
+            else:
+                logger.warning("uvloop 未安装，使用默认 asyncio 事件循环")
+
         # 处理器映射
         # 注意: 这里的 TOPIC 匹配 SDK 中的 /v1.0/im/bot/messages/get
         event_handlers = {
@@ -55,6 +82,7 @@ class DingTalkAdapter(BaseAdapter):
             client_id=self.client_id,
             client_secret=self.client_secret,
             event_handlers=event_handlers,
+            use_uvloop=self._use_uvloop,
         )
 
         # 启动长连接
@@ -65,55 +93,59 @@ class DingTalkAdapter(BaseAdapter):
         else:
             raise RuntimeError("钉钉 Stream Mode 启动失败")
 
-    async def _handle_bot_message(self, ding_msg: Any) -> None:
+    async def _handle_bot_message(self, ding_msg: Any, raw_data: Optional[Dict[str, Any]] = None) -> None:
         """
         处理钉钉机器人消息事件
         
         Args:
             ding_msg: dingtalk_stream.ChatbotMessage 对象
+            raw_data: SDK 回调中的原始消息 dict
         """
         try:
             # 转换为标准 Message 对象
-            message = self._parse_message(ding_msg)
+            message = self._parse_message(ding_msg, raw_data)
             
-            logger.info(f"收到钉钉消息: {message.sender['name']} -> {message.content['text'][:50]}")
+            logger.opt(lazy=True).info(
+                "收到钉钉消息: {} -> {}", lambda: message.sender["name"], lambda: message.content["text"][:50]
+            )
 
             # 调用消息处理器
             if self._message_handler:
-                if asyncio.iscoroutinefunction(self._message_handler):
+                if self._message_handler_is_coro:
                     await self._message_handler(message)
                 else:
                     self._message_handler(message)
         except Exception as e:
             logger.error(f"处理钉钉消息异常: {e}")
 
-    def _parse_message(self, ding_msg: Any) -> Message:
-        """将钉钉 SDK 消息对象转换为标准 Message 对象"""
+    def _parse_message(self, ding_msg: Any, raw_data: Optional[Dict[str, Any]] = None) -> Message:
+        """将钉钉 SDK 消息对象转换为标准 Message 对象
+
+        raw_data 为 SDK 回调携带的原始 dict（ChatbotMessage 即由它解析而来），
+        提供时直接作为 content.data，省去 to_dict() 的整体重建。
+        """
         # ding_msg 是 dingtalk_stream.ChatbotMessage
-        
+        message_type = ding_msg.message_type
+
         # 提取文本内容
-        text_content = ""
-        if ding_msg.message_type == "text":
-            text_content = ding_msg.text.content if ding_msg.text else ""
-        elif ding_msg.message_type == "richText":
-            texts = ding_msg.get_text_list()
-            text_content = "".join(texts) if texts else "[富文本]"
-        else:
-            text_content = f"[{ding_msg.message_type}]"
+        extractor = _TEXT_EXTRACTORS.get(message_type)
+        text_content = extractor(ding_msg) if extractor else f"[{message_type}]"
+
+        # 发送者 ID 与创建时间各读取一次
+        sender_id = ding_msg.sender_staff_id or ding_msg.sender_id
+        create_at = ding_msg.create_at
 
         # 判断会话类型 (1: 单聊, 2: 群聊)
         conv_type = "group" if ding_msg.conversation_type == "2" else "user"
-        
+
         # 对于单聊，会话 ID 应该是用户 ID，以便后续回复
-        conv_id = ding_msg.conversation_id
-        if conv_type == "user":
-            conv_id = ding_msg.sender_staff_id or ding_msg.sender_id
+        conv_id = ding_msg.conversation_id if conv_type == "group" else sender_id
 
         return Message(
             platform="dingtalk",
             message_id=str(ding_msg.message_id),
             sender={
-                "id": ding_msg.sender_staff_id or ding_msg.sender_id,
+                "id": sender_id,
                 "name": ding_msg.sender_nick or "DingTalkUser",
                 "type": "user",
             },
@@ -122,11 +154,11 @@ class DingTalkAdapter(BaseAdapter):
                 "type": conv_type,
             },
             content={
-                "type": "text" if ding_msg.message_type == "text" else ding_msg.message_type,
+                "type": message_type,
                 "text": text_content,
-                "data": ding_msg.to_dict(),
+                "data": raw_data if raw_data is not None else ding_msg.to_dict(),
             },
-            timestamp=int(ding_msg.create_at) if ding_msg.create_at else int(time.time() * 1000),
+            timestamp=int(create_at) if create_at else time.time_ns() // 1_000_000,
         )
 
     async def send_message(
@@ -144,12 +176,13 @@ class DingTalkAdapter(BaseAdapter):
         )
         
         if success:
-            return f"ding_{int(time.time())}"
+            return f"ding_{time.time_ns() // 1_000_000_000}"
         raise Exception("钉钉消息发送失败")
 
     def set_message_handler(self, handler: Callable[[Message], None]):
         """设置消息处理器"""
         self._message_handler = handler
+        self._message_handler_is_coro = asyncio.iscoroutinefunction(handler)
 
     async def shutdown(self) -> None:
         """关闭适配器"""
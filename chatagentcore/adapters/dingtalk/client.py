@@ -3,12 +3,14 @@
 基于钉钉官方 Python SDK (dingtalk-stream)，通过 WebSocket 长连接接收消息。
 """
 
-import json
 import asyncio
+import concurrent.futures
+import functools
+import itertools
+import os
 import time
-import httpx
-import threading
-import uuid
+import aiohttp
+import orjson
 from typing import Optional, Dict, Any, Callable, List
 from loguru import logger
 
@@ -21,18 +23,68 @@ except ImportError:
     HAS_SDK = False
     logger.warning("dingtalk-stream SDK 未安装，请运行: pip install dingtalk-stream")
 
+# uvloop 可选：基于 libuv 的事件循环，降低 WebSocket 收发的单消息开销
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
+# 交互卡片数据模板：固定部分预先序列化，发送时只填入 Markdown 文本（JSON 字符串）和内容 ID
+_CARD_DATA_TEMPLATE = (
+    '{"config":{"autoLayout":true,"enableForward":true},'
+    '"header":{"title":{"type":"text","text":"AI 助手回复"},"logo":"@lALPDfJ6V_FPDmvNAfTNAfQ"},'
+    '"contents":[{"type":"markdown","text":%s,"id":"text_%s"}]}'
+)
+
+# 所有 OpenAPI 请求都是 JSON，Content-Type 作为会话默认请求头，单次请求只需附带 Token
+_DEFAULT_HEADERS = {"Content-Type": "application/json"}
+
+
+def _orjson_dumps(obj: Any) -> str:
+    """aiohttp json= 参数使用的序列化函数"""
+    return orjson.dumps(obj).decode()
 
-def _run_ws_in_new_thread(client: 'dingtalk_stream.DingTalkStreamClient'):
-    """在独立线程中运行 WebSocket 客户端"""
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        # DingTalkStreamClient.start() 是异步的
-        loop.run_until_complete(client.start())
-    except Exception as e:
-        logger.error(f"钉钉 WebSocket 客户端运行异常: {e}")
-    finally:
-        loop.close()
+
+@functools.lru_cache(maxsize=4096)
+def _single_chat_receiver(user_id: str) -> str:
+    """单聊接收者字段（JSON 字符串），同一用户的连续回复复用缓存结果"""
+    return orjson.dumps({"userId": user_id}).decode()
+
+
+# cardBizId 使用进程随机前缀 + 自增计数，避免每次发送生成 uuid；随机前缀保证重启后不重复
+_CARD_BIZ_ID_PREFIX = f"biz_{os.urandom(4).hex()}_"
+_card_biz_id_counter = itertools.count()
+
+
+if HAS_SDK:
+    class InternalBotHandler(ChatbotHandler):
+        """机器人消息回调处理器：解析 SDK 回调并转交给注册的处理函数
+
+        process() 运行在长连接线程的事件循环中；设置 main_loop 后，处理函数被调度到
+        主事件循环执行，其内部创建的任务归主循环所有，可被关闭流程统一管理。
+        """
+
+        def __init__(self, handler_func: Callable[..., Any]):
+            super().__init__()
+            self.handler_func = handler_func
+            self.main_loop: Optional[asyncio.AbstractEventLoop] = None
+
+        async def process(self, callback: CallbackMessage):
+            # 异常必须在此转换为 ACK 状态：抛出到 SDK 会导致不回 ACK，钉钉侧将重复投递
+            try:
+                incoming_message = ChatbotMessage.from_dict(callback.data)
+                # 原始 dict 一并传入，免去下游 to_dict() 重建
+                coro = self.handler_func(incoming_message, callback.data)
+                if self.main_loop is None:
+                    await coro
+                else:
+                    # 等待主循环处理完成后再回 ACK，保持原有的投递语义
+                    await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.main_loop))
+                return AckMessage.STATUS_OK, "OK"
+            except Exception as e:
+                logger.error(f"处理钉钉消息异常: {e}")
+                return AckMessage.STATUS_NOT_IMPLEMENT, str(e)
 
 
 class DingTalkClientSDK:
@@ -43,6 +95,7 @@ class DingTalkClientSDK:
         client_id: str,
         client_secret: str,
         event_handlers: Optional[Dict[str, Callable[[Any], Any]]] = None,
+        use_uvloop: bool = False,
     ):
         """
         初始化钉钉客户端
@@ -51,6 +104,7 @@ class DingTalkClientSDK:
             client_id: 钉钉应用 AppKey
             client_secret: 钉钉应用 AppSecret
             event_handlers: 事件处理器字典，key 为事件类型，value 为处理函数
+            use_uvloop: 长连接线程是否使用 uvloop 事件循环（需已安装 uvloop）
         """
         if not HAS_SDK:
             raise ImportError(
@@ -60,6 +114,7 @@ class DingTalkClientSDK:
         self.client_id = client_id
         self.client_secret = client_secret
         self.event_handlers = event_handlers or {}
+        self.use_uvloop = use_uvloop and HAS_UVLOOP
 
         logger.info(f"钉钉 SDK 客户端初始化 (Client ID: {client_id})")
 
@@ -70,39 +125,53 @@ class DingTalkClientSDK:
         self._ws_client = dingtalk_stream.DingTalkStreamClient(self.credential)
         
         # 注册机器人回调
+        self._bot_handler: Optional["InternalBotHandler"] = None
         if ChatbotMessage.TOPIC in self.event_handlers:
-            class InternalBotHandler(ChatbotHandler):
-                def __init__(self, handler_func):
-                    super().__init__()
-                    self.handler_func = handler_func
-
-                async def process(self, callback: CallbackMessage):
-                    try:
-                        # 解析消息
-                        incoming_message = ChatbotMessage.from_dict(callback.data)
-                        # 调用处理器
-                        await self.handler_func(incoming_message)
-                        return AckMessage.STATUS_OK, "OK"
-                    except Exception as e:
-                        logger.error(f"处理钉钉消息异常: {e}")
-                        return AckMessage.STATUS_NOT_IMPLEMENT, str(e)
-
-            self._ws_client.register_callback_handler(
-                ChatbotMessage.TOPIC, 
-                InternalBotHandler(self.event_handlers[ChatbotMessage.TOPIC])
-            )
+            self._bot_handler = InternalBotHandler(self.event_handlers[ChatbotMessage.TOPIC])
+            self._ws_client.register_callback_handler(ChatbotMessage.TOPIC, self._bot_handler)
 
-        # 线程控制
-        self._ws_thread: Optional[threading.Thread] = None
+        # 长连接运行在专用线程池中，主事件循环通过 Future 追踪其生命周期
+        self._ws_executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="DingTalkWS"
+        )
+        self._ws_future: Optional[asyncio.Future] = None
+        self._ws_loop: Optional[asyncio.AbstractEventLoop] = None
         self._ws_started: bool = False
-        
+
         # HTTP 客户端用于主动发送消息
-        self._http_client = httpx.AsyncClient(timeout=30.0)
+        # 连接池保持到 api.dingtalk.com 的 TCP+TLS 长连接，避免每次发送重新握手
+        self._http_client = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300, keepalive_timeout=60),
+            timeout=aiohttp.ClientTimeout(total=30),
+            headers=_DEFAULT_HEADERS,
+            json_serialize=_orjson_dumps,
+        )
         self._access_token: Optional[str] = None
-        self._token_expire_time: float = 0
+        # 过期时间使用 monotonic 时钟（已预留 300 秒余量），不受系统时间调整影响
+        self._token_expire_mono: float = 0.0
+        # 防止并发发送时重复刷新 Token
+        self._token_lock = asyncio.Lock()
+
+    def _run_ws_blocking(self, loop: asyncio.AbstractEventLoop) -> None:
+        """在专用线程中运行 WebSocket 客户端，阻塞直到 stop_ws() 停止事件循环"""
+        asyncio.set_event_loop(loop)
+        try:
+            # DingTalkStreamClient.start() 是异步的，且内部自动重连、不会主动返回
+            loop.create_task(self._ws_client.start())
+            loop.run_forever()
+        except Exception as e:
+            logger.error(f"钉钉 WebSocket 客户端运行异常: {e}")
+        finally:
+            # 取消残留的连接、心跳任务，最多等待 1 秒
+            pending = asyncio.all_tasks(loop)
+            for task in pending:
+                task.cancel()
+            if pending:
+                loop.run_until_complete(asyncio.wait(pending, timeout=1.0))
+            loop.close()
 
     def start_ws(self) -> bool:
-        """启动 WebSocket 长连接"""
+        """启动 WebSocket 长连接（需在运行中的事件循环内调用）"""
         if self._ws_started:
             logger.warning("钉钉 WebSocket 长连接已启动")
             return True
@@ -110,14 +179,15 @@ class DingTalkClientSDK:
         logger.info("启动钉钉 WebSocket 长连接 (Stream Mode)...")
 
         try:
-            self._ws_thread = threading.Thread(
-                target=_run_ws_in_new_thread,
-                args=(self._ws_client,),
-                daemon=True,
-                name="DingTalkWSClient"
+            main_loop = asyncio.get_running_loop()
+            # 机器人消息回调交回主事件循环执行
+            if self._bot_handler is not None:
+                self._bot_handler.main_loop = main_loop
+            self._ws_loop = uvloop.new_event_loop() if self.use_uvloop else asyncio.new_event_loop()
+            self._ws_future = main_loop.run_in_executor(
+                self._ws_executor, self._run_ws_blocking, self._ws_loop
             )
-            self._ws_thread.start()
-            
+
             self._ws_started = True
             logger.info("钉钉 WebSocket 长连接已启动（在后台线程中运行）")
             return True
@@ -128,32 +198,43 @@ class DingTalkClientSDK:
     def stop_ws(self) -> None:
         """停止 WebSocket 长连接"""
         logger.info("停止钉钉 WebSocket 长连接...")
-        # SDK 没提供直接的 stop，但线程是 daemon 的
-        # 实际上可以通过关闭事件循环或者断开连接
+        # SDK 没提供直接的 stop，通过停止长连接线程中的事件循环退出
+        if self._ws_loop is not None:
+            try:
+                self._ws_loop.call_soon_threadsafe(self._ws_loop.stop)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+            self._ws_loop = None
         self._ws_started = False
-        self._ws_thread = None
         logger.info("钉钉 WebSocket 长连接已停止")
 
     async def _get_access_token(self) -> str:
         """获取访问令牌"""
-        if self._access_token and time.time() < self._token_expire_time - 300:
+        # 快速路径：缓存有效时无需加锁
+        if self._access_token and time.monotonic() < self._token_expire_mono:
             return self._access_token
 
-        url = "https://api.dingtalk.com/v1.0/oauth2/accessToken"
-        payload = {
-            "appKey": self.client_id,
-            "appSecret": self.client_secret,
-        }
-        
-        response = await self._http_client.post(url, json=payload)
-        response.raise_for_status()
-        data = response.json()
-        
-        self._access_token = data.get("accessToken")
-        expire = data.get("expireIn", 7200)
-        self._token_expire_time = time.time() + expire
-        
-        return self._access_token
+        async with self._token_lock:
+            # 等待锁期间可能已被其他协程刷新
+            if self._access_token and time.monotonic() < self._token_expire_mono:
+                return self._access_token
+
+            url = "https://api.dingtalk.com/v1.0/oauth2/accessToken"
+            payload = {
+                "appKey": self.client_id,
+                "appSecret": self.client_secret,
+            }
+
+            async with self._http_client.post(url, json=payload) as response:
+                response.raise_for_status()
+                data = await response.json(content_type=None)
+
+            self._access_token = data.get("accessToken")
+            expire = data.get("expireIn", 7200)
+            self._token_expire_mono = time.monotonic() + expire - 300
+
+            return self._access_token
 
     async def send_message(
         self,
@@ -169,57 +250,40 @@ class DingTalkClientSDK:
         try:
             token = await self._get_access_token()
             url = "https://api.dingtalk.com/v1.0/im/v1.0/robot/interactiveCards/send"
-            headers = {
-                "x-acs-dingtalk-access-token": token,
-                "Content-Type": "application/json",
-            }
-            
-            # 构造符合钉钉规范的交互卡片结构
-            # 这是一个包含标题和 Markdown 内容的完整卡片数据
-            card_data_obj = {
-                "config": {
-                    "autoLayout": True,
-                    "enableForward": True
-                },
-                "header": {
-                    "title": {
-                        "type": "text",
-                        "text": "AI 助手回复"
-                    },
-                    "logo": "@lALPDfJ6V_FPDmvNAfTNAfQ"
-                },
-                "contents": [
-                    {
-                        "type": "markdown",
-                        "text": str(content),
-                        "id": f"text_{uuid.uuid4().hex[:8]}"
-                    }
-                ]
-            }
+            headers = {"x-acs-dingtalk-access-token": token}
             
+            # 构造符合钉钉规范的交互卡片结构（标题 + Markdown 内容）
+            card_data = _CARD_DATA_TEMPLATE % (
+                orjson.dumps(str(content)).decode(),
+                os.urandom(4).hex(),
+            )
+
             payload = {
                 "cardTemplateId": "StandardCard",
                 "robotCode": self.client_id,
-                "cardData": json.dumps(card_data_obj, ensure_ascii=False),
-                "cardBizId": f"biz_{uuid.uuid4().hex[:16]}",
+                # cardData 字段要求为字符串
+                "cardData": card_data,
+                "cardBizId": f"{_CARD_BIZ_ID_PREFIX}{next(_card_biz_id_counter)}",
             }
-            
+
             if conversation_type == "group":
                 payload["openConversationId"] = to
             else:
                 # 单聊必须指定 singleChatReceiver
-                payload["singleChatReceiver"] = json.dumps({"userId": to})
-            
-            logger.debug(f"发送钉钉卡片请求: {json.dumps(payload, ensure_ascii=False)}")
-            
-            response = await self._http_client.post(url, json=payload, headers=headers)
-            data = response.json()
-            
-            if response.status_code == 200:
-                logger.debug(f"钉钉消息发送成功: {data}")
+                payload["singleChatReceiver"] = _single_chat_receiver(to)
+
+            body = orjson.dumps(payload)
+            logger.opt(lazy=True).debug("发送钉钉卡片请求: {}", body.decode)
+
+            async with self._http_client.post(url, data=body, headers=headers) as response:
+                status = response.status
+                data = await response.json(content_type=None)
+
+            if status == 200:
+                logger.debug("钉钉消息发送成功: {}", data)
                 return True
             else:
-                logger.error(f"钉钉消息发送失败 (HTTP {response.status_code}): {data}")
+                logger.error(f"钉钉消息发送失败 (HTTP {status}): {data}")
                 return False
                 
         except Exception as e:
@@ -229,7 +293,16 @@ class DingTalkClientSDK:
     async def close(self):
         """关闭客户端"""
         self.stop_ws()
-        await self._http_client.aclose()
+        if self._ws_future is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(self._ws_future), timeout=5.0)
+            except asyncio.TimeoutError:
+                logger.warning("等待钉钉 WebSocket 线程退出超时")
+            except Exception as e:
+                logger.error(f"钉钉 WebSocket 线程退出异常: {e}")
+            self._ws_future = None
+        self._ws_executor.shutdown(wait=False, cancel_futures=True)
+        await self._http_client.close()
 
 
-__all__ = ["DingTalkClientSDK", "HAS_SDK"]
+__all__ = ["DingTalkClientSDK", "HAS_SDK", "HAS_UVLOOP"]
@@ -1,23 +1,46 @@
 """Feishu adapter implementation - 支持 WebSocket 长连接和 Webhook 回调方式"""
 
-import sys
 import asyncio
 import json
-from typing import Dict, Any, Callable, Optional, Final
+from typing import Dict, Any, Awaitable, Callable, Optional, Final, Set
 from loguru import logger
 from chatagentcore.adapters.base import BaseAdapter, Message
-from chatagentcore.adapters.feishu.client import FeishuClientSDK, HAS_SDK
-
-# Python 3.11+ 有整数转换限制，飞书消息可能包含超大数字 ID
-# 设置 sys.set_int_max_str_digits(0) 移除限制
-# 详情: https://docs.python.org/3/library/stdtypes.html#int-max-str-digits
-if hasattr(sys, 'set_int_max_str_digits'):
-    sys.set_int_max_str_digits(0)
+from chatagentcore.adapters.feishu.client import FeishuClientSDK, HAS_SDK, HAS_UVLOOP
 
 # 连接模式常量
 MODE_WEBSOCKET: Final = "websocket"
 MODE_WEBHOOK: Final = "webhook"
 
+# 待处理事件队列上限，队列满时丢弃新事件（背压保护）
+EVENT_QUEUE_MAXSIZE: Final = 1024
+# 消费者单次唤醒最多取出的事件数
+EVENT_BATCH_SIZE: Final = 32
+# 同时在处理中的事件处理器上限，每个事件独立运行，慢处理器不阻塞其他事件
+EVENT_MAX_CONCURRENCY: Final = 32
+
+# Webhook 事件类型 -> (异步处理方法名, 同步预处理方法名)
+_WEBHOOK_DISPATCH: Final[Dict[str, tuple]] = {
+    "im.message.receive_v1": ("_handle_message_event_async", "_prepare_message_event"),
+    "im.message.group_at_v1": ("_handle_at_message_event_async", "_prepare_at_message_event"),
+}
+
+
+def _extract_text_content(content_data: Any, content_raw: Any) -> str:
+    """提取文本消息内容"""
+    if content_data and isinstance(content_data, dict):
+        return content_data.get("text", "")
+    if content_raw:
+        return str(content_data)
+    return ""
+
+
+# message_type -> 文本提取函数 (content_data, content_raw) -> str
+_TEXT_EXTRACTORS: Final[Dict[str, Callable[[Any, Any], str]]] = {
+    "text": _extract_text_content,
+    "interactive": lambda _data, _raw: "[卡片消息]",
+    "post": lambda _data, _raw: "[富文本消息]",
+}
+
 
 class FeishuAdapter(BaseAdapter):
     """飞书适配器 - 支持 WebSocket 长连接模式和 Webhook 回调模式"""
@@ -32,6 +55,7 @@ class FeishuAdapter(BaseAdapter):
                 - app_secret: 飞书应用密钥
                 - connection_mode: 连接模式，"websocket"(推荐) 或 "webhook"，默认 "websocket"
                 - domain: 域名，"feishu" 或 "lark"，默认 "feishu"
+                - use_uvloop: 是否使用 uvloop 事件循环，默认 False
         """
         super().__init__(config)
 
@@ -39,6 +63,7 @@ class FeishuAdapter(BaseAdapter):
         self.app_secret = config.get("app_secret", "")
         self._connection_mode = config.get("connection_mode", MODE_WEBSOCKET) or MODE_WEBSOCKET
         self._domain = config.get("domain", "feishu") or "feishu"
+        self._use_uvloop = bool(config.get("use_uvloop", False))
 
         # 验证连接模式
         if self._connection_mode not in (MODE_WEBSOCKET, MODE_WEBHOOK):
@@ -47,6 +72,8 @@ class FeishuAdapter(BaseAdapter):
 
         # 事件处理器
         self._message_handler: Optional[Callable] = None
+        # 处理器是否为协程函数，在注册时计算一次，避免每条消息重复反射检查
+        self._message_handler_is_coro: bool = False
 
         # 客户端
         self._client: Optional[FeishuClientSDK] = None
@@ -54,6 +81,12 @@ class FeishuAdapter(BaseAdapter):
         # WebSocket 相关
         self._ws_started: bool = False
 
+        # 事件队列：长连接线程 / Webhook 只负责入队，由主事件循环中的单个消费者处理
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._event_queue: Optional[asyncio.Queue] = None
+        self._consumer_task: Optional[asyncio.Task] = None
+        self._handler_tasks: Set[asyncio.Task] = set()
+
     async def initialize(self) -> None:
         """初始化适配器"""
         if not HAS_SDK:
@@ -64,6 +97,18 @@ class FeishuAdapter(BaseAdapter):
         mode_name = "WebSocket 长连接" if self._connection_mode == MODE_WEBSOCKET else "Webhook 回调"
         logger.info(f"初始化飞书适配器（{mode_name}）...")
 
+        # uvloop 只用于长连接线程自己的事件循环（由客户端创建），不修改全局策略
+        if self._use_uvloop:
+            if HAS_UVLOOP:
+                logger.info("长连接线程启用 uvloop 事件循环")
+            else:
+                logger.warning("uvloop 未安装，使用默认 asyncio 事件循环")
+
+        # 启动事件消费者
+        self._loop = asyncio.get_running_loop()
+        self._event_queue = asyncio.Queue(maxsize=EVENT_QUEUE_MAXSIZE)
+        self._consumer_task = asyncio.create_task(self._event_consumer())
+
         # 创建事件处理器映射（用于 WebSocket 模式）
         event_handlers = {
             "im.message.receive_v1": self._handle_ws_message_event,
@@ -78,6 +123,7 @@ class FeishuAdapter(BaseAdapter):
             app_secret=self.app_secret,
             event_handlers=event_handlers,
             domain=self._domain,
+            use_uvloop=self._use_uvloop,
         )
 
         # 根据连接模式启动
@@ -95,7 +141,7 @@ class FeishuAdapter(BaseAdapter):
             logger.info("飞书适配器初始化完成")
             logger.info("请配置 Webhook 回调地址: http://your-server:port/webhook/feishu")
 
-    def _handle_ws_message_event(self, payload: str) -> Dict[str, Any]:
+    def _handle_ws_message_event(self, payload: str | bytes) -> Dict[str, Any]:
         """
         处理 WebSocket 模式下的消息事件
 
@@ -106,26 +152,24 @@ class FeishuAdapter(BaseAdapter):
             响应数据
         """
         try:
-            # payload 可能是 bytes 类型，需要解码为字符串
-            if isinstance(payload, bytes):
-                payload = payload.decode('utf-8', errors='ignore')
-
+            # json 同时接受 str 和 bytes（UTF-8），无需先解码；整数不限位数，超过 64 位的 ID 不丢精度
             event_data = json.loads(payload)
-            asyncio.create_task(self._handle_message_event_async(event_data))
+            self._route_message_event(
+                self._handle_message_event_async, self._prepare_message_event, event_data
+            )
             return {"msg": "success"}
         except Exception as e:
             logger.error(f"WebSocket 消息事件处理异常: {e}")
             return {"msg": "failed"}
 
-    def _handle_ws_at_message_event(self, payload: str) -> Dict[str, Any]:
+    def _handle_ws_at_message_event(self, payload: str | bytes) -> Dict[str, Any]:
         """处理 WebSocket 模式下的群 @ 消息事件"""
         try:
-            # payload 可能是 bytes 类型，需要解码为字符串
-            if isinstance(payload, bytes):
-                payload = payload.decode('utf-8', errors='ignore')
-
+            # json 同时接受 str 和 bytes（UTF-8），无需先解码；整数不限位数，超过 64 位的 ID 不丢精度
             event_data = json.loads(payload)
-            asyncio.create_task(self._handle_at_message_event_async(event_data))
+            self._route_message_event(
+                self._handle_at_message_event_async, self._prepare_at_message_event, event_data
+            )
             return {"msg": "success"}
         except Exception as e:
             logger.error(f"WebSocket @ 消息事件处理异常: {e}")
@@ -155,6 +199,126 @@ class FeishuAdapter(BaseAdapter):
             logger.error(f"机器人离开事件处理异常: {e}")
             return {"msg": "failed"}
 
+    def _route_message_event(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[None]],
+        prepare: Callable[[Dict[str, Any]], Optional[Message]],
+        event_data: Dict[str, Any],
+    ) -> None:
+        """
+        按消息处理器类型分发消息事件，可在任意线程中调用
+
+        协程处理器经事件队列批量处理；同步处理器无需创建任务，
+        直接在主事件循环的回调中解析并调用。
+
+        Args:
+            handler: 异步事件处理方法（协程处理器路径）
+            prepare: 同步预处理方法，返回待投递的 Message（同步处理器路径）
+            event_data: 事件数据
+        """
+        if self._message_handler_is_coro:
+            self._dispatch_event(handler, event_data)
+        else:
+            self._dispatch_inline(prepare, event_data)
+
+    def _dispatch_inline(
+        self, prepare: Callable[[Dict[str, Any]], Optional[Message]], event_data: Dict[str, Any]
+    ) -> None:
+        """在主事件循环中直接执行同步处理器路径，不经过队列"""
+        if self._loop is None:
+            logger.warning("飞书适配器未初始化，丢弃事件")
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._handle_message_inline(prepare, event_data)
+        else:
+            self._loop.call_soon_threadsafe(self._handle_message_inline, prepare, event_data)
+
+    def _handle_message_inline(
+        self, prepare: Callable[[Dict[str, Any]], Optional[Message]], event_data: Dict[str, Any]
+    ) -> None:
+        """同步处理器路径：解析事件并直接调用处理器（必须在主事件循环中调用）"""
+        try:
+            message = prepare(event_data)
+            if message is not None:
+                self._message_handler(message)
+        except Exception as e:
+            logger.error(f"处理消息事件异常: {e}")
+
+    def _dispatch_event(
+        self, handler: Callable[[Dict[str, Any]], Awaitable[None]], event_data: Dict[str, Any]
+    ) -> None:
+        """
+        将事件投递到主事件循环的处理队列，可在任意线程中调用
+
+        Args:
+            handler: 异步事件处理方法
+            event_data: 事件数据
+        """
+        if self._loop is None or self._event_queue is None:
+            logger.warning("飞书适配器未初始化，丢弃事件")
+            return
+
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+
+        if running_loop is self._loop:
+            self._enqueue_event(handler, event_data)
+        else:
+            # WebSocket 长连接回调运行在 SDK 线程中，需线程安全地切换到主事件循环
+            self._loop.call_soon_threadsafe(self._enqueue_event, handler, event_data)
+
+    def _enqueue_event(
+        self, handler: Callable[[Dict[str, Any]], Awaitable[None]], event_data: Dict[str, Any]
+    ) -> None:
+        """事件入队（必须在主事件循环中调用）"""
+        try:
+            self._event_queue.put_nowait((handler, event_data))
+        except asyncio.QueueFull:
+            logger.warning(f"飞书事件队列已满 ({EVENT_QUEUE_MAXSIZE})，丢弃事件")
+
+    async def _event_consumer(self) -> None:
+        """事件消费者 - 每次唤醒取出队列中已就绪的一批事件，每个事件作为独立任务处理
+
+        只批量出队，不等待整批处理完成；在处理中的事件数受 EVENT_MAX_CONCURRENCY 限制。
+        """
+        queue = self._event_queue
+        semaphore = asyncio.Semaphore(EVENT_MAX_CONCURRENCY)
+        while True:
+            batch = [await queue.get()]
+            while len(batch) < EVENT_BATCH_SIZE:
+                try:
+                    batch.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            for handler, event_data in batch:
+                await semaphore.acquire()
+                task = asyncio.create_task(self._run_event_handler(handler, event_data, semaphore))
+                self._handler_tasks.add(task)
+                task.add_done_callback(self._handler_tasks.discard)
+
+    async def _run_event_handler(
+        self,
+        handler: Callable[[Dict[str, Any]], Awaitable[None]],
+        event_data: Dict[str, Any],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """运行单个事件处理器，异常只记录日志"""
+        try:
+            await handler(event_data)
+        except Exception as e:
+            logger.error(f"飞书事件处理异常: {e}")
+        finally:
+            semaphore.release()
+
     def handle_webhook(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         处理 Webhook 回调事件（仅 Webhook 模式）
@@ -175,15 +339,15 @@ class FeishuAdapter(BaseAdapter):
             event_type = header.get("event_type", "")
             log_id = header.get("log_id", "")
 
-            logger.info(f"Received Webhook event: {event_type} (log_id: {log_id})")
+            logger.info("Received Webhook event: {} (log_id: {})", event_type, log_id)
 
-            # 消息接收事件
-            if event_type in ("im.message.receive_v1", "im.message.group_at_v1"):
-                asyncio.create_task(self._handle_message_event_async(event_data))
-
-            elif event_type == "im.message.group_at_v1":
-                # 群 @ 消息的处理可以扩展
-                asyncio.create_task(self._handle_at_message_event_async(event_data))
+            # 消息接收事件 / 群 @ 消息事件
+            method_names = _WEBHOOK_DISPATCH.get(event_type)
+            if method_names:
+                handler_name, prepare_name = method_names
+                self._route_message_event(
+                    getattr(self, handler_name), getattr(self, prepare_name), event_data
+                )
 
             return {"msg": "success"}
 
@@ -191,52 +355,72 @@ class FeishuAdapter(BaseAdapter):
             logger.error(f"处理 Webhook 事件异常: {e}")
             return {"code": 1, "msg": str(e)}
 
-    async def _handle_message_event_async(self, event_data: Dict[str, Any]) -> None:
+    def _prepare_message_event(self, event_data: Dict[str, Any]) -> Optional[Message]:
         """
-        异步处理消息事件
+        解析消息事件，返回需投递给处理器的消息，未设置处理器时返回 None
 
         Args:
             event_data: 事件数据
         """
-        try:
-            message = await self._parse_message_from_event(event_data)
+        message = self._parse_message_from_event(event_data)
+
+        logger.opt(lazy=True).info(
+            "处理飞书消息: {} -> {}", lambda: message.sender["id"], lambda: message.content["text"][:50]
+        )
 
-            logger.info(f"处理飞书消息: {message.sender['id']} -> {message.content['text'][:50]}")
+        if not self._message_handler:
+            logger.opt(lazy=True).debug("收到消息但未设置处理器: {}", lambda: message.content["text"][:50])
+            return None
+        return message
 
-            # 调用消息处理器
-            if self._message_handler:
-                if asyncio.iscoroutinefunction(self._message_handler):
-                    await self._message_handler(message)
-                else:
-                    self._message_handler(message)
-            else:
-                logger.debug(f"收到消息但未设置处理器: {message.content['text'][:50]}")
+    def _prepare_at_message_event(self, event_data: Dict[str, Any]) -> Optional[Message]:
+        """解析群 @ 消息事件，返回需投递给处理器的消息，未设置处理器时返回 None"""
+        message = self._parse_message_from_event(event_data)
+        logger.info("处理飞书群 @ 消息: {}", message.sender["id"])
+
+        # @ 消息也可以通过消息处理器处理
+        if not self._message_handler:
+            return None
+        content = message.content
+        content["text"] = f"[群 @] {content.get('text', '')}"
+        return message
 
+    async def _handle_message_event_async(self, event_data: Dict[str, Any]) -> None:
+        """
+        异步处理消息事件
+
+        Args:
+            event_data: 事件数据
+        """
+        try:
+            message = self._prepare_message_event(event_data)
+            if message is not None:
+                await self._deliver_message(message)
         except Exception as e:
             logger.error(f"处理消息事件异常: {e}")
 
     async def _handle_at_message_event_async(self, event_data: Dict[str, Any]) -> None:
         """处理群 @ 消息事件"""
         try:
-            message = await self._parse_message_from_event(event_data)
-            logger.info(f"处理飞书群 @ 消息: {message.sender['id']}")
-
-            # @ 消息也可以通过消息处理器处理
-            if self._message_handler:
-                content = message.content
-                content["text"] = f"[群 @] {content.get('text', '')}"
-                if asyncio.iscoroutinefunction(self._message_handler):
-                    await self._message_handler(message)
-                else:
-                    self._message_handler(message)
-
+            message = self._prepare_at_message_event(event_data)
+            if message is not None:
+                await self._deliver_message(message)
         except Exception as e:
             logger.error(f"处理 @ 消息事件异常: {e}")
 
-    async def _parse_message_from_event(self, event_data: Dict[str, Any]) -> Message:
+    async def _deliver_message(self, message: Message) -> None:
+        """调用消息处理器（处理器可能在入队后被替换，需再次判断类型）"""
+        if self._message_handler_is_coro:
+            await self._message_handler(message)
+        else:
+            self._message_handler(message)
+
+    def _parse_message_from_event(self, event_data: Dict[str, Any]) -> Message:
         """
         从事件数据中解析消息
 
+        纯同步解析，不涉及 I/O；异步处理逻辑保留在调用方。
+
         Args:
             event_data: 飞书事件数据
 
@@ -288,46 +472,44 @@ class FeishuAdapter(BaseAdapter):
 
         # 解析消息内容 - 从 message 对象获取
         content_raw = message_obj.get("content", "")
-        content_data = {}
-        text_content = ""
 
         # content 可能是字符串形式的 JSON，或者是已解析的 dict
-        if content_raw:
-            if isinstance(content_raw, str):
-                try:
-                    content_data = json.loads(content_raw) if content_raw else {}
-                except json.JSONDecodeError:
-                    content_data = {"text": content_raw}
-            elif isinstance(content_raw, dict):
-                content_data = content_raw
-        else:
+        if not content_raw:
             content_data = {"text": ""}
+        elif isinstance(content_raw, str):
+            try:
+                content_data = json.loads(content_raw)
+            except json.JSONDecodeError:
+                content_data = {"text": content_raw}
+        elif isinstance(content_raw, dict):
+            content_data = content_raw
+        else:
+            content_data = {}
 
-        logger.debug(f"Content data: {str(content_data)[:200]}")
+        logger.opt(lazy=True).debug("Content data: {}", lambda: str(content_data)[:200])
 
         # 根据 message_type 处理内容
-        if message_type == "text":
-            if content_data and isinstance(content_data, dict):
-                text_content = content_data.get("text", "")
-            elif content_raw:
-                text_content = str(content_data)
-        elif message_type == "interactive":
-            text_content = "[卡片消息]"
-        elif message_type == "post":
-            text_content = "[富文本消息]"
+        extractor = _TEXT_EXTRACTORS.get(message_type)
+        if extractor is not None:
+            text_content = extractor(content_data, content_raw)
         else:
             if not message_type:
                 logger.warning(f"message_type 为空，content: {str(content_data)[:200]}")
             text_content = f"[{message_type} 消息]"
 
-        # 判断会话类型
-        chat_type = message_obj.get("chat_type", "user") or ("group" if chat_id and chat_id.startswith("oc_") else "user")
+        # 判断会话类型：chat_type 缺失时默认为 user，仅当字段为空值时按 chat_id 前缀 (oc_) 推断
+        chat_type = message_obj.get("chat_type", "user")
+        if not chat_type:
+            chat_type = "group" if chat_id and chat_id[:3] == "oc_" else "user"
 
         # 归一化会话 ID：私聊使用 open_id，群聊使用 chat_id
         final_conv_id = chat_id
         if chat_type == "user":
             final_conv_id = sender_id
 
+        # timestamp 优先使用 message.create_time，再使用 header.create_time
+        create_time = message_obj.get("create_time") or header.get("create_time") or 0
+
         return Message(
             platform="feishu",
             message_id=message_id,
@@ -345,14 +527,26 @@ class FeishuAdapter(BaseAdapter):
                 "text": text_content,
                 "data": content_data if content_data else {},
             },
-            # timestamp 优先使用 message.create_time，再使用 header.create_time
-            timestamp=(int(message_obj.get("create_time", 0) or header.get("create_time", 0)) * 1000),
+            timestamp=int(create_time) * 1000,
         )
 
     async def shutdown(self) -> None:
         """关闭适配器"""
         logger.info("关闭飞书适配器...")
 
+        if self._consumer_task:
+            self._consumer_task.cancel()
+            try:
+                await self._consumer_task
+            except asyncio.CancelledError:
+                pass
+            self._consumer_task = None
+        for task in list(self._handler_tasks):
+            task.cancel()
+        if self._handler_tasks:
+            await asyncio.gather(*self._handler_tasks, return_exceptions=True)
+        self._event_queue = None
+
         if self._client:
             # 停止 WebSocket 长连接（如果已启动）
             if self._ws_started:
@@ -372,6 +566,7 @@ class FeishuAdapter(BaseAdapter):
             handler: 消息处理函数，接收 Message 对象
         """
         self._message_handler = handler
+        self._message_handler_is_coro = asyncio.iscoroutinefunction(handler)
 
     @property
     def connection_mode(self) -> str:
@@ -434,4 +629,4 @@ class FeishuAdapter(BaseAdapter):
             raise Exception("消息发送失败")
 
 
-__all__ = ["FeishuAdapter", "MODE_WEBSOCKET", "MODE_WEBHOOK"]
+__all__ = ["FeishuAdapter", "MODE_WEBSOCKET", "MODE_WEBHOOK", "EVENT_QUEUE_MAXSIZE", "EVENT_BATCH_SIZE", "EVENT_MAX_CONCURRENCY"]
@@ -28,6 +28,13 @@ except ImportError:
     HAS_SDK = False
     logger.warning("lark_oapi SDK 未安装，请运行: pip install lark_oapi")
 
+# uvloop 可选：基于 libuv 的事件循环，降低 WebSocket 收发的单消息开销
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
 
 # 域名映射
 _DOMAIN_MAP = {
@@ -47,14 +54,15 @@ def _run_in_thread(loop: asyncio.AbstractEventLoop, coro):
     loop.run_until_complete(coro)
 
 
-def _run_ws_in_new_thread(ws_client: WSClient):
+def _run_ws_in_new_thread(ws_client: WSClient, use_uvloop: bool = False):
     """
     在独立线程中运行 WebSocket 客户端
 
     创建新的事件循环以避免与主线程/主应用的 event loop 冲突。
+    use_uvloop 时只为该线程创建 uvloop 循环，不修改全局事件循环策略。
     """
     # 创建新的事件循环
-    loop = asyncio.new_event_loop()
+    loop = uvloop.new_event_loop() if use_uvloop else asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
 
     # 重置 lark-oapi 可能引用的所有全局 loop 变量
@@ -101,6 +109,7 @@ class FeishuClientSDK:
         app_secret: str,
         event_handlers: Optional[Dict[str, Callable[[str], Any]]] = None,
         domain: str = "feishu",
+        use_uvloop: bool = False,
     ):
         """
         初始化飞书客户端
@@ -110,6 +119,7 @@ class FeishuClientSDK:
             app_secret: 飞书应用密钥
             event_handlers: 事件处理器字典，key 为事件类型，value 为处理函数（接收 JSON 字符串）
             domain: 域名，feishu 或 lark
+            use_uvloop: 长连接线程是否使用 uvloop 事件循环（需已安装 uvloop）
         """
         if not HAS_SDK:
             raise ImportError(
@@ -120,6 +130,7 @@ class FeishuClientSDK:
         self.app_secret = app_secret
         self.event_handlers = event_handlers or {}
         self.domain = domain
+        self.use_uvloop = use_uvloop and HAS_UVLOOP
         # 解析为完整的 URL
         self._ws_domain = _resolve_domain(domain)
 
@@ -245,7 +256,7 @@ class FeishuClientSDK:
             # 使用独立函数来确保在新线程中创建新的事件循环
             self._ws_thread = threading.Thread(
                 target=_run_ws_in_new_thread,
-                args=(self._ws_client,),
+                args=(self._ws_client, self.use_uvloop),
                 daemon=True,
                 name="FeishuWSClient"
             )
@@ -3,9 +3,10 @@
 import asyncio
 import threading
 import json
+from collections import OrderedDict
 import uuid
 import time
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Final, Optional, Tuple
 from loguru import logger
 
 try:
@@ -19,6 +20,69 @@ except ImportError:
 
 from chatagentcore.adapters.base import BaseAdapter, Message
 
+# conversation_type -> (sender_id, conversation_id) for the botpy message class of that event
+_ID_EXTRACTORS: Final[Dict[str, Callable[[Any], Tuple[Any, Any]]]] = {
+    "group": lambda m: (m.author.member_openid, m.group_openid),
+    "user": lambda m: (m.author.user_openid, m.author.user_openid),
+    "guild": lambda m: (m.author.id, m.channel_id),
+}
+
+# conversation_type -> botpy API call (api, to, reply_msg_id, content) -> awaitable
+_SEND_DISPATCH: Final[Dict[str, Callable[[Any, str, str, str], Any]]] = {
+    "group": lambda api, to, msg_id, content: api.post_group_message(
+        group_openid=to, msg_type=0, msg_id=msg_id, content=content
+    ),
+    "user": lambda api, to, msg_id, content: api.post_c2c_message(
+        openid=to, msg_type=0, msg_id=msg_id, content=content
+    ),
+    # Guild channel posts take no reply id
+    "guild": lambda api, to, _msg_id, content: api.post_message(channel_id=to, content=content),
+}
+
+# Bounds for the passive-reply message id cache. QQ accepts a passive reply for a
+# limited window only (minutes for groups, up to an hour for C2C); older ids are useless
+REPLY_ID_CACHE_SIZE: Final = 10_000
+REPLY_ID_TTL: Final = 3600.0
+
+# Seconds initialize() waits for botpy's on_ready before continuing anyway
+READY_TIMEOUT: Final = 30.0
+
+# Delay before logging in again after all gateway sessions ended; doubles on each
+# consecutive quick failure up to the max, and resets once a run outlasts the max
+RECONNECT_DELAY: Final = 1.0
+RECONNECT_MAX_DELAY: Final = 60.0
+
+
+class _ReplyIdCache:
+    """Bounded LRU of conversation_id -> last message id, entries expire after ttl seconds"""
+
+    __slots__ = ("_data", "_maxsize", "_ttl")
+
+    def __init__(self, maxsize: int = REPLY_ID_CACHE_SIZE, ttl: float = REPLY_ID_TTL):
+        self._data: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._maxsize = maxsize
+        self._ttl = ttl
+
+    def __setitem__(self, key: str, value: str) -> None:
+        data = self._data
+        data[key] = (value, time.monotonic() + self._ttl)
+        data.move_to_end(key)
+        while len(data) > self._maxsize:
+            data.popitem(last=False)
+
+    def get(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires = entry
+        if time.monotonic() >= expires:
+            self._data.pop(key, None)
+            return default
+        return value
+
+    def __len__(self) -> int:
+        return len(self._data)
+
 
 class QQBotClient(botpy.Client):
     """Custom BotPy Client to handle events"""
@@ -32,6 +96,8 @@ class QQBotClient(botpy.Client):
     async def on_ready(self):
         self.robot_info = self.robot
         logger.info(f"QQ Bot 「{self.robot.name}」 is ready!")
+        if self.adapter:
+            self.adapter._ready_event.set()
 
     async def on_at_message_create(self, message: BotpyMessage):
         """Handle Guild @Bot messages"""
@@ -47,39 +113,33 @@ class QQBotClient(botpy.Client):
 
     def _handle_message(self, message: Any, conversation_type: str):
         """Convert and dispatch message"""
+        handler = self.message_handler
+        if not handler:
+            # Nothing would consume the message, so don't build it
+            logger.warning("No message handler set for QQ adapter")
+            return
+
         try:
             # Extract content
             content_str = getattr(message, "content", "")
-            
-            # Construct sender info
-            # GroupMessage/C2CMessage has author as Member/User object
-            author = getattr(message, "author", None)
-            sender_id = ""
-            if author:
-                sender_id = getattr(author, "id", "") or getattr(author, "user_openid", "") or getattr(author, "member_openid", "")
-            
-            # Fallback if author object doesn't have what we expect (BotPy structure can vary)
+
+            # Fast path: each event type has a known botpy message class
+            try:
+                sender_id, conversation_id = _ID_EXTRACTORS[conversation_type](message)
+            except (KeyError, AttributeError):
+                sender_id = conversation_id = None
             if not sender_id:
-                # Try direct attributes on message (some events might flatten it)
-                sender_id = getattr(message, "author_id", "") 
+                sender_id, conversation_id = self._extract_ids_fallback(message, conversation_type)
 
             sender_name = "User" # hard to get name sometimes without extra API call
-            
-            # Construct conversation info
-            conversation_id = ""
-            if conversation_type == "group":
-                conversation_id = getattr(message, "group_openid", "")
-            elif conversation_type == "guild":
-                conversation_id = getattr(message, "channel_id", "")
-            elif conversation_type == "user":
-                conversation_id = sender_id # for C2C, conv id is usually the user openid
 
             # Store the message_id for potential replies
-            msg_id = getattr(message, "id", "")
+            msg_id = getattr(message, "id", "") or ""
             if msg_id and conversation_id and self.adapter:
                 self.adapter._last_msg_ids[conversation_id] = msg_id
 
-            msg_obj = Message(
+            # Fields are built here from trusted values, so skip pydantic validation
+            msg_obj = Message.model_construct(
                 platform="qq",
                 message_id=msg_id,
                 sender={"id": sender_id, "name": sender_name, "type": "user"},
@@ -87,21 +147,55 @@ class QQBotClient(botpy.Client):
                 content={"type": "text", "text": content_str},
                 timestamp=int(time.time()) # Timestamp is often not readily available in simple format
             )
-            
-            if self.message_handler:
-                self.message_handler(msg_obj)
-            else:
-                logger.warning("No message handler set for QQ adapter")
-                
+
+            handler(msg_obj)
+
         except Exception as e:
             logger.error(f"Error handling QQ message: {e}")
 
+    @staticmethod
+    def _extract_ids_fallback(message: Any, conversation_type: str) -> Tuple[Any, Any]:
+        """Defensive (sender_id, conversation_id) lookup for unexpected message shapes"""
+        # Construct sender info
+        # GroupMessage/C2CMessage has author as Member/User object
+        author = getattr(message, "author", None)
+        sender_id = ""
+        if author:
+            sender_id = getattr(author, "id", "") or getattr(author, "user_openid", "") or getattr(author, "member_openid", "")
+        
+        # Fallback if author object doesn't have what we expect (BotPy structure can vary)
+        if not sender_id:
+            # Try direct attributes on message (some events might flatten it)
+            sender_id = getattr(message, "author_id", "") 
+
+        # Construct conversation info
+        conversation_id = ""
+        if conversation_type == "group":
+            conversation_id = getattr(message, "group_openid", "")
+        elif conversation_type == "guild":
+            conversation_id = getattr(message, "channel_id", "")
+        elif conversation_type == "user":
+            conversation_id = sender_id # for C2C, conv id is usually the user openid
+        return sender_id, conversation_id
+
 
-def _run_bot_in_thread(client: QQBotClient, appid: str, secret: str):
-    """Run bot in a separate thread with its own loop"""
+def _run_bot_in_thread(
+    client: QQBotClient,
+    appid: str,
+    secret: str,
+    loop: Optional[asyncio.AbstractEventLoop] = None,
+):
+    """Run bot in a separate thread with its own loop
+
+    Used by the interactive CLI (cli/test_qq_ws.py); QQAdapter hosts botpy on the
+    application's main loop instead. Pass ``loop`` when the client was constructed in this thread on a loop
+    created for it, so that loop is reused instead of allocating another one.
+    The loop is closed when the bot stops.
+    """
     # Create new loop for this thread
     # We need to set the event loop for this thread so botpy can find it
-    loop = asyncio.new_event_loop()
+    if loop is None:
+        loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
     
     # IMPORTANT: Update client's loop to the new thread loop
@@ -132,10 +226,13 @@ class QQAdapter(BaseAdapter):
         self.app_id = config.get("app_id")
         self.token = config.get("token") # This is AppSecret
         self.client: Optional[QQBotClient] = None
-        self._thread: Optional[threading.Thread] = None
+        # Bot task: botpy runs directly on the main loop
+        self._bot_task: Optional[asyncio.Task] = None
+        # Set by on_ready (or when the bot stops) so initialize() can return
+        self._ready_event = threading.Event()
         self._message_handler: Optional[Callable[[Message], None]] = None
         # Cache for last message IDs to support passive replies
-        self._last_msg_ids: Dict[str, str] = {}
+        self._last_msg_ids = _ReplyIdCache()
 
     async def initialize(self) -> None:
         if not HAS_BOTPY:
@@ -151,42 +248,70 @@ class QQAdapter(BaseAdapter):
         # Enable public messages (group/c2c) and guild messages
         intents = botpy.Intents(public_messages=True, public_guild_messages=True)
         
+        self._ready_event.clear()
         self.client = QQBotClient(
             intents=intents, 
             message_handler=self._message_handler,
             adapter=self
         )
         
-        # Run in thread
-        self._thread = threading.Thread(
-            target=_run_bot_in_thread,
-            args=(self.client, self.app_id, self.token),
-            daemon=True,
-            name="QQBotThread"
-        )
-        self._thread.start()
-        # Wait a bit for thread to start (optional)
-        await asyncio.sleep(0.5)
+        # Host botpy on the main loop: events and sends need no thread hop
+        loop = asyncio.get_running_loop()
+        self.client.loop = loop
+        self._bot_task = loop.create_task(self._run_bot(), name="QQBot")
+
+        # Wait for the gateway session instead of a fixed delay
+        ready = await asyncio.to_thread(self._ready_event.wait, READY_TIMEOUT)
+        if not ready or self.client.robot_info is None:
+            logger.warning("QQ Bot not ready yet, continuing startup")
+
+    async def _run_bot(self) -> None:
+        """Run botpy on the current (main) loop until it is closed or cancelled"""
+        loop = asyncio.get_running_loop()
+        app_handler = loop.get_exception_handler()
+        delay = RECONNECT_DELAY
+        try:
+            logger.info(f"Starting QQ Bot with AppID: {self.app_id}")
+            async with self.client:
+                while not self.client.is_closed():
+                    # botpy installs a loop-wide exception handler (stops the loop on
+                    # ZeroDivisionError) right before it hands back the session coroutine.
+                    # With ret_coro the app's handler is put back before anything else
+                    # runs on the shared loop, then the sessions run here
+                    sessions = await self.client.start(
+                        appid=self.app_id, secret=self.token, ret_coro=True
+                    )
+                    loop.set_exception_handler(app_handler)
+                    started = loop.time()
+                    await sessions
+                    if self.client.is_closed():
+                        break
+                    # All sessions ended. botpy's run loop would re-run them on its
+                    # existing connection, which ret_coro does not expose, so log in
+                    # again with a fresh connection after a backoff
+                    if loop.time() - started > RECONNECT_MAX_DELAY:
+                        delay = RECONNECT_DELAY
+                    logger.warning(f"QQ Bot sessions ended, logging in again in {delay:.0f}s")
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"QQ Bot crashed: {e}")
+        finally:
+            self._ready_event.set()
 
     async def shutdown(self) -> None:
-        if self.client:
-            # client.close() is async
-            # We need to call it from a loop. 
-            # But the client is running in another loop/thread.
-            # botpy doesn't have a thread-safe close method easily accessible from outside?
-            # Actually client.close() just sets self._closed = True and awaits http.close().
-            # It should be safe to call if we can schedule it on the client's loop?
-            # Or just set _closed flag if we could access it.
-            
-            # Simple approach: let the thread die when main process dies (daemon=True)
-            # But for clean shutdown:
+        if self._bot_task is not None:
+            # Cancelling the task exits `async with client`, which closes it
+            self._bot_task.cancel()
             try:
-                # We can't easily await client.close() because it needs to run on client's loop
-                # If we assume client.run() checks _closed, maybe we can just close the loop?
+                await self._bot_task
+            except asyncio.CancelledError:
                 pass
-            except Exception as e:
-                logger.error(f"Error closing QQ client: {e}")
-                
+            self._bot_task = None
+            self.client = None
+
         logger.info("QQ Adapter shutdown")
 
     def set_message_handler(self, handler: Callable[[Message], None]):
@@ -205,56 +330,32 @@ class QQAdapter(BaseAdapter):
             logger.warning(f"Empty conversation_type for QQ message to {to}, defaulting to 'user'")
             conversation_type = "user"
             
+        # Use the last received message_id as msg_id for passive reply
+        msg_id_to_reply = self._last_msg_ids.get(to, "0")
+
+        # botpy shares our loop: call the API directly
+        return await self._do_send(to, conversation_type, content, msg_id_to_reply)
+
+    async def _do_send(self, to: str, conversation_type: str, content: str, msg_id_to_reply: str) -> str:
+        """The actual API call; MUST run on the client's loop"""
         try:
-            # Use the last received message_id as msg_id for passive reply
-            msg_id_to_reply = self._last_msg_ids.get(to, "0")
+            res = None
+            send = _SEND_DISPATCH.get(conversation_type)
+            if send is not None:
+                res = await send(self.client.api, to, msg_id_to_reply, content)
+            
+            # Log response for debugging
+            logger.info(f"QQ API Response ({conversation_type}, reply_to={msg_id_to_reply}): {res}")
             
-            # The actual API call that MUST run on the client's loop
-            async def _do_send():
-                try:
-                    res = None
-                    if conversation_type == "group":
-                        res = await self.client.api.post_group_message(
-                            group_openid=to,
-                            msg_type=0, 
-                            msg_id=msg_id_to_reply, 
-                            content=content
-                        )
-                    elif conversation_type == "user":
-                        res = await self.client.api.post_c2c_message(
-                            openid=to,
-                            msg_type=0,
-                            msg_id=msg_id_to_reply, 
-                            content=content
-                        )
-                    elif conversation_type == "guild":
-                        res = await self.client.api.post_message(
-                            channel_id=to,
-                            content=content
-                        )
-                    
-                    # Log response for debugging
-                    logger.info(f"QQ API Response ({conversation_type}, reply_to={msg_id_to_reply}): {res}")
-                    
-                    if res is None:
-                        return ""
-                    
-                    # Handle both dict and object response types from botpy
-                    if isinstance(res, dict):
-                        return res.get("id", res.get("msg_id", ""))
-                    else:
-                        return getattr(res, "id", getattr(res, "msg_id", ""))
-                        
-                except Exception as e:
-                    logger.error(f"QQ API internal error during _do_send: {e}", exc_info=True)
-                    return ""
-
-            # Submit the coroutine to the client's loop and wait for it
-            # This fixes "Timeout context manager should be used inside a task" error
-            future = asyncio.run_coroutine_threadsafe(_do_send(), self.client.loop)
-            # Wrap the concurrent.futures.Future into an asyncio.Future and await it
-            return await asyncio.wrap_future(future)
+            if res is None:
+                return ""
             
+            # Handle both dict and object response types from botpy
+            if isinstance(res, dict):
+                return res.get("id", res.get("msg_id", ""))
+            else:
+                return getattr(res, "id", getattr(res, "msg_id", ""))
+                
         except Exception as e:
-            logger.error(f"Failed to send QQ message: {e}")
-            raise e
+            logger.error(f"QQ API internal error during _do_send: {e}", exc_info=True)
+            return ""
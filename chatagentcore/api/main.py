@@ -1,18 +1,28 @@
 """FastAPI application"""
 
 import asyncio
+import concurrent.futures
 import time
+from typing import Final, FrozenSet
 from pathlib import Path
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import ValidationError
 from loguru import logger
 from chatagentcore.core.event_bus import get_event_bus
 from chatagentcore.core.config_manager import get_config_manager
 from chatagentcore.core.adapter_manager import get_adapter_manager
 from chatagentcore.storage.logger import LogConfig
 from chatagentcore.api.websocket.manager import get_manager
-from chatagentcore.api.models.message import WSAuthMessage, WSSubscribeMessage, WSMessage
+from chatagentcore.api.models.message import (
+    WSAuthMessage,
+    WSSubscribeMessage,
+    WSPingMessage,
+    WSMessage,
+    parse_ws_message,
+)
 from chatagentcore.api.schemas.config import Settings
 from chatagentcore.api.routes import message as message_routes
 from chatagentcore.api.routes import webhook as webhook_routes
@@ -21,76 +31,116 @@ from chatagentcore.adapters.base import Message as BaseMessage
 from fastapi.staticfiles import StaticFiles
 
 
-def _default_message_handler(message: BaseMessage) -> None:
+def _log_broadcast_error(future: concurrent.futures.Future) -> None:
+    """广播任务完成回调，记录异常"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error(f"Failed to broadcast message via WebSocket: {future.exception()}")
+
+
+# 入站消息日志分隔线
+_LOG_SEPARATOR = "=" * 70
+# 入站文本日志最多预览的字符数，超长消息只切一次片，不对全文分行
+_LOG_TEXT_PREVIEW: Final = 400
+# 预编译的 Pong 响应模板，心跳路径无需构造 WSMessage 与 JSON 序列化
+_PONG_TEMPLATE: Final = '{"type":"pong","channel":"system","timestamp":%d,"payload":{"ping_timestamp":%s}}'
+
+
+def _format_inbound(message: BaseMessage) -> str:
     """
-    默认消息处理器 - 打印接收到的消息并广播到 WebSocket
+    格式化入站消息的日志文本（多行）
 
     Args:
         message: 收到的消息对象
     """
-    sender_id = message.sender.get("id", "")
-    sender_name = message.sender.get("name", "")
-    conv_id = message.conversation.get("id", "")
-    conv_type = message.conversation.get("type", "")
-
-    logger.info("=" * 70)
-    logger.info("📨 收到消息 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-    logger.info(f"平台: {message.platform}")
-    logger.info(f"发送者: {sender_name} ({sender_id})")
-    logger.info(f"会话: {conv_type}:{conv_id}")
-
+    sender = message.sender
+    conversation = message.conversation
     content = message.content
+    sender_id = sender.get("id", "")
+    sender_name = sender.get("name", "")
+    conv_id = conversation.get("id", "")
+    conv_type = conversation.get("type", "")
+
+    lines = [
+        _LOG_SEPARATOR,
+        "📨 收到消息 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━",
+        f"平台: {message.platform}",
+        f"发送者: {sender_name} ({sender_id})",
+        f"会话: {conv_type}:{conv_id}",
+    ]
+
     msg_type = content.get("type", "unknown")
+    text = content.get("text")
 
     # 显示消息内容
-    if msg_type == "text" and content.get("text"):
-        text = content["text"]
-        if text:
-            # 多行消息分行显示
-            for line in text.split("\n"):
-                logger.info(f"内容: {line[:100]}")  # 限制每行长度
-        else:
-            logger.info("内容: [空消息]")
+    if msg_type == "text" and text:
+        # 多行消息分行显示（仅预览前 _LOG_TEXT_PREVIEW 个字符）
+        head = text[:_LOG_TEXT_PREVIEW]
+        for line in head.split("\n"):
+            lines.append(f"内容: {line[:100]}")  # 限制每行长度
+        if len(text) > _LOG_TEXT_PREVIEW:
+            lines.append(f"内容: ...（共 {len(text)} 字符）")
     elif msg_type == "interactive":
-        logger.info("类型: 交互卡片消息")
+        lines.append("类型: 交互卡片消息")
         data = content.get("data", {})
         if isinstance(data, dict):
-            logger.info(f"卡片数据: {str(data)[:200]}...")
+            lines.append(f"卡片数据: {str(data)[:200]}...")
     elif msg_type == "post":
-        logger.info("类型: 富文本消息")
+        lines.append("类型: 富文本消息")
         data = content.get("data", {})
         if isinstance(data, dict):
-            logger.info(f"富文本数据: {str(data)[:200]}...")
+            lines.append(f"富文本数据: {str(data)[:200]}...")
     else:
-        logger.info(f"类型: {msg_type}")
+        lines.append(f"类型: {msg_type}")
         data = content.get("data", {})
         if data:
             data_str = str(data)[:100]
-            logger.info(f"数据: {data_str}...")
+            lines.append(f"数据: {data_str}...")
+
+    lines.append(_LOG_SEPARATOR)
+    return "\n".join(lines)
 
-    logger.info("=" * 70)
 
-    # 广播消息到 WebSocket 订阅者
+def _default_message_handler(message: BaseMessage) -> None:
+    """
+    默认消息处理器 - 打印接收到的消息并广播到 WebSocket
+
+    Args:
+        message: 收到的消息对象
+    """
+    # 整条消息合并为一条日志，且仅在 INFO 级别启用时才格式化
+    logger.opt(lazy=True).info("{}", lambda: _format_inbound(message))
+
+    # 广播消息到 WebSocket 订阅者，无订阅者时跳过构造与序列化
+    if not ws_manager.has_subscribers("messages"):
+        return
+
+    now = int(time.time())
     ws_payload = {
         "platform": message.platform,
         "sender": message.sender,
         "conversation": message.conversation,
         "content": message.content,
-        "timestamp": int(time.time())
+        "timestamp": now
     }
 
-    ws_msg = WSMessage(
+    # 字段均来自已校验的 Message，跳过重复校验
+    ws_msg = WSMessage.model_construct(
         type="message",
         channel="messages",
-        timestamp=int(time.time()),
+        timestamp=now,
         payload=ws_payload
     )
+    # 只序列化一次，所有订阅者共享同一份 JSON 文本
+    ws_text = ws_msg.model_dump_json()
 
-    # 获取当前运行的事件循环并创建广播任务
+    # 处理器可能运行在适配器线程中，通过启动时缓存的主事件循环调度广播任务
     try:
-        loop = asyncio.get_event_loop()
-        if loop.is_running():
-            loop.create_task(ws_manager.broadcast(ws_msg, channel="messages"))
+        loop = getattr(app.state, "main_loop", None)
+        if loop is not None and loop.is_running():
+            future = asyncio.run_coroutine_threadsafe(
+                ws_manager.broadcast_text(ws_text, channel="messages"), loop
+            )
+            future.add_done_callback(_log_broadcast_error)
     except Exception as e:
         logger.error(f"Failed to broadcast message via WebSocket: {e}")
 
@@ -101,6 +151,9 @@ async def lifespan(app: FastAPI):
     # 启动时执行
     logger.info("Starting ChatAgentCore...")
 
+    # 缓存主事件循环，供运行在其他线程中的消息处理器调度任务
+    app.state.main_loop = asyncio.get_running_loop()
+
     # 加载配置 (如果尚未加载，则加载默认配置)
     config_manager = get_config_manager()
     if not config_manager._config:
@@ -108,7 +161,7 @@ async def lifespan(app: FastAPI):
 
     # 配置日志
     log_config = LogConfig(
-        log_dir=config_manager.config.logging.file.rsplit("/", 1)[0],
+        log_dir=Path(config_manager.config.logging.file).parent,
         level=config_manager.config.logging.level,
     )
     log_config.setup()
@@ -156,23 +209,26 @@ async def lifespan(app: FastAPI):
     await config_manager.watch(interval=5.0)
 
     # 注册配置变更回调，实现平台热重载
-    async def on_config_change(new_settings: Settings):
+    async def on_config_change(new_settings: Settings, changed: FrozenSet[str]):
         logger.info("Config change detected, updating adapters and tokens...")
         
         # 1. 同步 WebSocket Token
-        if new_settings.auth.token:
+        if "auth" in changed and new_settings.auth.token:
             ws_manager.set_valid_tokens([new_settings.auth.token])
             
         # 2. 更新适配器
         adapter_manager = get_adapter_manager()
         
         for platform_name in ["feishu", "dingtalk", "qq"]:
+            # 只处理 platforms.<name> 配置段有变更的平台
+            if f"platforms.{platform_name}" not in changed:
+                continue
             cfg = getattr(new_settings.platforms, platform_name)
             current_adapter = adapter_manager.get_adapter(platform_name)
             
             if cfg.enabled:
                 if current_adapter:
-                    # 如果已经运行，检查配置是否变更（这里简单处理为直接重启）
+                    # 如果已经运行且配置段有变更，则重启
                     logger.info(f"Platform {platform_name} config updated, reloading...")
                     await adapter_manager.reload_adapter(platform_name, cfg.model_dump())
                     new_adapter = adapter_manager.get_adapter(platform_name)
@@ -191,25 +247,36 @@ async def lifespan(app: FastAPI):
                     logger.info(f"Platform {platform_name} disabled, unloading...")
                     await adapter_manager.unload_adapter(platform_name)
 
-    def config_change_wrapper(new_settings: Settings):
+    def config_change_wrapper(new_settings: Settings, changed: FrozenSet[str]):
         # ConfigManager 的回调是同步的，我们需要在事件循环中运行异步任务
         try:
             loop = asyncio.get_event_loop()
             if loop.is_running():
-                loop.create_task(on_config_change(new_settings))
+                loop.create_task(on_config_change(new_settings, changed))
         except Exception as e:
             logger.error(f"Error triggering config change callback: {e}")
 
-    config_manager.on_change(config_change_wrapper)
+    config_manager.on_change(config_change_wrapper, keys={"auth", "platforms"})
 
     # 同步有效的 API Token 到 WebSocket 管理器
     ws_manager.set_valid_tokens([config_manager.config.auth.token])
 
-    # 启动清理过期连接的后台任务
+    # 启动清理过期连接的后台任务，关闭时通过事件立即唤醒退出
+    shutdown_event = asyncio.Event()
+
     async def prune_task():
-        while True:
+        while not shutdown_event.is_set():
+            try:
+                await asyncio.wait_for(shutdown_event.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                pass
+            except asyncio.CancelledError:
+                break
+            else:
+                # 收到关闭信号
+                break
+
             try:
-                await asyncio.sleep(30)
                 count = await ws_manager.prune_stale_connections(timeout=90.0)
                 if count > 0:
                     logger.info(f"Background task pruned {count} stale connections")
@@ -227,7 +294,11 @@ async def lifespan(app: FastAPI):
     # 关闭时执行
     logger.info("Shutting down ChatAgentCore...")
     
-    prune_job.cancel()
+    shutdown_event.set()
+    try:
+        await asyncio.wait_for(prune_job, timeout=5.0)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        pass
     await event_bus.stop()
     await config_manager.stop_watch()
 
@@ -244,6 +315,7 @@ app = FastAPI(
     version="0.1.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
@@ -311,38 +383,32 @@ async def websocket_events(websocket: WebSocket):
 
     try:
         while True:
-            # 接收客户端消息
-            data: dict = await websocket.receive_json()
+            # 接收客户端消息：JSON 解析、按 type 分派与字段校验一次完成
+            raw = await websocket.receive_text()
             ws_manager.update_last_seen(websocket)
-            msg_type = data.get("type")
+            try:
+                msg = parse_ws_message(raw)
+            except ValidationError as e:
+                # 无效 JSON、未知消息类型或字段缺失
+                logger.warning(f"Invalid WebSocket message: {e.errors(include_url=False)[0]['msg']}")
+                continue
 
-            if msg_type == "auth":
+            if isinstance(msg, WSAuthMessage):
                 # 处理认证
-                auth_msg = WSAuthMessage(**data)
-                await ws_manager.handle_auth(websocket, auth_msg)
+                await ws_manager.handle_auth(websocket, msg)
 
-            elif msg_type == "ping":
+            elif isinstance(msg, WSPingMessage):
                 # 处理 Ping 并返回 Pong
-                pong_msg = WSMessage(
-                    type="pong",
-                    channel="system",
-                    timestamp=int(time.time()),
-                    payload={"ping_timestamp": data.get("timestamp")}
-                )
-                await ws_manager.send_json(websocket, pong_msg)
-
-            elif msg_type == "subscribe":
+                ping_ts = "null" if msg.timestamp is None else msg.timestamp
+                await ws_manager.send_text(websocket, _PONG_TEMPLATE % (int(time.time()), ping_ts))
+
+            elif isinstance(msg, WSSubscribeMessage):
                 # 处理订阅
                 if not ws_manager.is_authenticated(websocket):
                     await websocket.close(code=4008, reason="Authenticate first")
                     return
 
-                sub_msg = WSSubscribeMessage(**data)
-                await ws_manager.handle_subscribe(websocket, sub_msg)
-
-            else:
-                # 未知消息类型
-                logger.warning(f"Unknown message type: {msg_type}")
+                await ws_manager.handle_subscribe(websocket, msg)
 
     except WebSocketDisconnect:
         logger.info(f"WebSocket disconnected: {user_id}")
@@ -1,7 +1,7 @@
 """Unified message models"""
 
-from typing import Any, Dict, Optional, Literal
-from pydantic import BaseModel, Field
+from typing import Annotated, Any, Dict, Final, Optional, Literal, Union
+from pydantic import BaseModel, Field, TypeAdapter
 
 
 class SenderInfo(BaseModel):
@@ -154,7 +154,7 @@ class WSPingMessage(BaseModel):
     """WebSocket Ping 消息"""
 
     type: Literal["ping"] = "ping"
-    timestamp: int = Field(..., description="时间戳")
+    timestamp: Optional[int] = Field(None, description="时间戳")
 
 
 class WSMessage(BaseModel):
@@ -166,6 +166,31 @@ class WSMessage(BaseModel):
     payload: Optional[Dict[str, Any]] = Field(None, description="消息内容")
 
 
+# 客户端上行 WebSocket 消息：按 type 字段区分的联合类型
+WSIncomingMessage = Annotated[
+    Union[WSAuthMessage, WSSubscribeMessage, WSPingMessage], Field(discriminator="type")
+]
+
+# 校验器只构建一次，JSON 解析与按 type 分派在 pydantic-core 中一次完成
+_WS_INCOMING_ADAPTER: Final = TypeAdapter(WSIncomingMessage)
+
+
+def parse_ws_message(raw: str | bytes) -> WSIncomingMessage:
+    """
+    解析客户端发送的 WebSocket 消息
+
+    Args:
+        raw: 原始 JSON 文本
+
+    Returns:
+        对应类型的消息对象
+
+    Raises:
+        pydantic.ValidationError: JSON 无效、type 未知或字段校验失败
+    """
+    return _WS_INCOMING_ADAPTER.validate_json(raw)
+
+
 __all__ = [
     "SenderInfo",
     "ConversationInfo",
@@ -185,4 +210,6 @@ __all__ = [
     "WSSubscribeMessage",
     "WSPingMessage",
     "WSMessage",
+    "WSIncomingMessage",
+    "parse_ws_message",
 ]
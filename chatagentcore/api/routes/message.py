@@ -1,5 +1,6 @@
 """Message API routes"""
 
+import hmac
 import time
 from typing import Any, Dict
 from fastapi import APIRouter, HTTPException, Depends, Header
@@ -36,7 +37,8 @@ async def verify_token(authorization: str = Header(None)) -> str | None:
 
     token = authorization.replace("Bearer ", "") if authorization.startswith("Bearer ") else authorization
 
-    if token != valid_token:
+    # 常量时间比较，避免通过响应耗时推测 Token
+    if not hmac.compare_digest(token.encode(), valid_token.encode()):
         raise HTTPException(status_code=403, detail="Invalid token")
 
     return token
@@ -243,9 +245,10 @@ async def update_config(
 
         platform_config = platforms[request.platform]
 
-        # 更新配置
+        # 更新配置（配置模型只读，替换为新的平台配置）
         if request.enabled is not None:
-            platform_config.enabled = request.enabled
+            platform_config = platform_config.model_copy(update={"enabled": request.enabled})
+            config_manager.apply_overrides("platforms", **{request.platform: platform_config})
 
         result = {
             "platform": request.platform,
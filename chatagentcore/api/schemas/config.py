@@ -1,13 +1,18 @@
 """Configuration schemas using Pydantic"""
 
 from typing import Literal
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# 配置加载后只读：嵌套模型在父模型校验时直接复用，不再复制
+_FROZEN_CONFIG = ConfigDict(frozen=True, revalidate_instances="never", extra="ignore")
+
 
 class AuthConfig(BaseModel):
     """认证配置"""
 
+    model_config = _FROZEN_CONFIG
+
     type: Literal["fixed_token", "jwt"] = Field(default="fixed_token", description="认证类型")
     token: str = Field(default="", description="固定内部认证 Token（为空则禁用验证）")
 
@@ -20,6 +25,8 @@ class AuthConfig(BaseModel):
 class LoggingConfig(BaseModel):
     """日志配置"""
 
+    model_config = _FROZEN_CONFIG
+
     level: str = Field(default="INFO", description="日志级别")
     file: str = Field(default="logs/chatagentcore.log", description="日志文件路径")
     rotation: str = Field(default="10 MB", description="日志轮转大小")
@@ -29,6 +36,8 @@ class LoggingConfig(BaseModel):
 class PlatformConfig(BaseModel):
     """平台配置基类"""
 
+    model_config = _FROZEN_CONFIG
+
     enabled: bool = Field(default=False, description="是否启用此平台")
     type: str = Field(default="app", description="平台类型：app | group")
 
@@ -42,6 +51,7 @@ class FeishuConfig(PlatformConfig):
     encrypt_key: str = Field(default="", description="加密密钥（可选）")
     connection_mode: Literal["websocket", "webhook"] = Field(default="websocket", description="连接模式：websocket(推荐) | webhook")
     domain: Literal["feishu", "lark"] = Field(default="feishu", description="域名：feishu | lark")
+    use_uvloop: bool = Field(default=False, description="是否使用 uvloop 事件循环（需安装 uvloop）")
 
     @field_validator("app_id", "app_secret")
     @classmethod
@@ -76,7 +86,8 @@ class DingTalkConfig(PlatformConfig):
     app_key: str = Field(default="", description="应用 Key (Client ID)")
     app_secret: str = Field(default="", description="应用密钥 (Client Secret)")
     connection_mode: Literal["websocket", "webhook"] = Field(default="websocket", description="连接模式：websocket(推荐) | webhook")
-    
+    use_uvloop: bool = Field(default=False, description="是否使用 uvloop 事件循环（需安装 uvloop）")
+
     # 以下用于 Webhook 模式，Stream 模式不需要
     token: str = Field(default="", description="令牌")
     aes_key: str = Field(default="", description="AES 密钥")
@@ -108,6 +119,8 @@ class QQConfig(PlatformConfig):
 class PlatformsConfig(BaseModel):
     """所有平台配置"""
 
+    model_config = _FROZEN_CONFIG
+
     feishu: FeishuConfig = Field(default_factory=FeishuConfig)
     wecom: WecomConfig = Field(default_factory=WecomConfig)
     dingtalk: DingTalkConfig = Field(default_factory=DingTalkConfig)
@@ -117,6 +130,8 @@ class PlatformsConfig(BaseModel):
 class ServerConfig(BaseModel):
     """服务器配置"""
 
+    model_config = _FROZEN_CONFIG
+
     host: str = Field(default="127.0.0.1", description="监听地址")
     port: int = Field(default=36598, description="监听端口")
     debug: bool = Field(default=False, description="调试模式")
@@ -130,6 +145,8 @@ class Settings(BaseSettings):
         env_file_encoding="utf-8",
         env_prefix="CAC_",  # 环境变量前缀
         case_sensitive=False,
+        frozen=True,
+        revalidate_instances="never",
     )
 
     server: ServerConfig = Field(default_factory=ServerConfig)
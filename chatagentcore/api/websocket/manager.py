@@ -1,29 +1,76 @@
 """WebSocket connection manager"""
 
 import asyncio
-import json
-from typing import Dict, Set, Optional
+import hmac
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, Final, FrozenSet, Set, Optional
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect
 from loguru import logger
 from chatagentcore.api.models.message import WSMessage, WSAuthMessage, WSSubscribeMessage
 
+# 广播时单个连接的发送超时（秒），慢客户端不会拖慢整次广播
+BROADCAST_SEND_TIMEOUT: Final = 1.0
+
+# 预先格式化的系统确认消息模板（字段顺序与 WSMessage 一致），动态字符串经 orjson 编码后填入
+_AUTH_ACK_TEMPLATE: Final = (
+    '{"type":"auth_ack","channel":"system","timestamp":%d,'
+    '"payload":{"user_id":%s,"status":"authenticated"}}'
+)
+_AUTH_ERROR_TEMPLATE: Final = (
+    '{"type":"error","channel":"system","timestamp":%d,'
+    '"payload":{"error":"Invalid token","code":401}}'
+)
+_SUBSCRIBED_TEMPLATE: Final = (
+    '{"type":"event","channel":"system","timestamp":%d,'
+    '"payload":{"event":"subscribed","channels":%s}}'
+)
+
+
+@dataclass(slots=True)
+class ConnState:
+    """单个连接的状态"""
+
+    user_id: str
+    authenticated: bool = False
+    # 最后活跃时间（time.monotonic()）
+    last_seen: float = 0.0
+    # 已订阅的频道，断开时据此清理频道索引
+    channels: Set[str] = field(default_factory=set)
+
+
+def _encode(data: WSMessage) -> str:
+    """序列化 WebSocket 消息为 JSON 文本（缺失时间戳时直接补在消息上）"""
+    if not data.timestamp:
+        data.timestamp = int(time.time())
+    return data.model_dump_json()
+
 
 class ConnectionManager:
     """WebSocket 连接管理器 - 管理活跃连接和消息广播"""
 
     def __init__(self):
         # 活跃连接: websocket -> 用户信息
-        self._connections: Dict[WebSocket, Dict[str, Any]] = {}
+        self._connections: Dict[WebSocket, ConnState] = {}
+
+        # 频道反向索引: 频道 -> set of websocket，定向广播只访问订阅者
+        self._channel_index: Dict[str, Set[WebSocket]] = {}
 
-        # 用户订阅: user_id -> {频道 -> set of websocket}
-        self._subscriptions: Dict[str, Dict[str, Set[WebSocket]]] = {}
+        # 用户索引: user_id -> websocket
+        self._user_index: Dict[str, WebSocket] = {}
 
         # Token 验证（默认为空，等待配置同步）
-        self._valid_tokens: Set[str] = set()
+        self._valid_tokens: FrozenSet[str] = frozenset()
+        # 只有一个 Token 时（最常见）保存其字节形式，用常量时间比较
+        self._single_token: Optional[bytes] = None
 
     def set_valid_tokens(self, tokens: list[str]) -> None:
         """设置有效的 Token 列表"""
-        self._valid_tokens = set(tokens)
+        self._valid_tokens = frozenset(tokens)
+        self._single_token = (
+            next(iter(self._valid_tokens)).encode() if len(self._valid_tokens) == 1 else None
+        )
         logger.info(f"Updated valid tokens, count: {len(self._valid_tokens)}")
 
     async def connect(self, websocket: WebSocket) -> str:
@@ -40,16 +87,11 @@ class ConnectionManager:
 
         # 生成简单的用户 ID
         user_id = f"ws_user_{id(websocket)}"
-        import time
 
-        self._connections[websocket] = {
-            "user_id": user_id,
-            "authenticated": False,
-            "last_seen": time.time(),
-        }
+        # 活跃时间使用单调时钟，不受系统时间调整影响
+        self._connections[websocket] = ConnState(user_id=user_id, last_seen=time.monotonic())
 
-        # 初始化用户的订阅
-        self._subscriptions[user_id] = {}
+        self._user_index[user_id] = websocket
 
         logger.info(f"WebSocket connected: {user_id}")
         return user_id
@@ -61,27 +103,24 @@ class ConnectionManager:
         Args:
             websocket: WebSocket 连接
         """
-        if websocket not in self._connections:
+        state = self._connections.pop(websocket, None)
+        if state is None:
             return
 
-        user_id = self._connections[websocket]["user_id"]
+        user_id = state.user_id
 
-        # 从所有订阅中移除
-        if user_id in self._subscriptions:
-            for channel in list(self._subscriptions[user_id].keys()):
-                self.unsubscribe(websocket, channel)
-            del self._subscriptions[user_id]
+        # 只遍历该连接自己订阅的频道
+        for channel in state.channels:
+            self._remove_from_channel(websocket, channel)
 
-        # 移除连接
-        del self._connections[websocket]
+        self._user_index.pop(user_id, None)
 
         logger.info(f"WebSocket disconnected: {user_id}")
 
     def update_last_seen(self, websocket: WebSocket) -> None:
         """更新最后看到连接的时间"""
         if websocket in self._connections:
-            import time
-            self._connections[websocket]["last_seen"] = time.time()
+            self._connections[websocket].last_seen = time.monotonic()
 
     async def prune_stale_connections(self, timeout: float = 60.0) -> int:
         """
@@ -93,16 +132,15 @@ class ConnectionManager:
         Returns:
             清理的连接数
         """
-        import time
-        now = time.time()
-        stale = []
-
-        for websocket, info in self._connections.items():
-            if now - info.get("last_seen", 0) > timeout:
-                stale.append(websocket)
-
-        for websocket in stale:
-            logger.warning(f"Pruning stale WebSocket connection: {info.get('user_id')}")
+        now = time.monotonic()
+        stale = [
+            (websocket, state.user_id)
+            for websocket, state in self._connections.items()
+            if now - state.last_seen > timeout
+        ]
+
+        for websocket, user_id in stale:
+            logger.warning(f"Pruning stale WebSocket connection: {user_id}")
             try:
                 await websocket.close(code=1000)
             except Exception:
@@ -119,21 +157,33 @@ class ConnectionManager:
             websocket: WebSocket 连接
             data: 消息数据
         """
+        await self.send_text(websocket, _encode(data))
+
+    async def send_text(self, websocket: WebSocket, text: str) -> bool:
+        """
+        发送已序列化的 JSON 文本到指定连接，发送失败时断开该连接
+
+        Args:
+            websocket: WebSocket 连接
+            text: JSON 文本
+
+        Returns:
+            是否发送成功
+        """
         try:
-            # 确保时间戳存在
-            dumped_data = data.model_dump()
-            if "timestamp" not in dumped_data or not dumped_data["timestamp"]:
-                import time
-                dumped_data["timestamp"] = int(time.time())
-            await websocket.send_json(dumped_data)
+            await websocket.send_text(text)
+            return True
         except Exception as e:
             logger.error(f"Error sending message to websocket: {e}")
             await self.disconnect(websocket)
+            return False
 
     async def broadcast(self, data: WSMessage, channel: str = "*") -> int:
         """
         广播消息到所有订阅了指定频道的连接
 
+        消息只序列化一次，所有订阅者共享同一份 JSON 文本。
+
         Args:
             data: 消息数据
             channel: 频道名称，"*" 表示广播给所有连接
@@ -141,39 +191,61 @@ class ConnectionManager:
         Returns:
             成功发送的连接数
         """
-        sent_count = 0
-        disconnected: list[WebSocket] = []
+        return await self.broadcast_text(_encode(data), channel)
+
+    async def broadcast_text(self, text: str, channel: str = "*") -> int:
+        """
+        广播已序列化的 JSON 文本到所有订阅了指定频道的连接
 
+        Args:
+            text: JSON 文本
+            channel: 频道名称，"*" 表示广播给所有连接
+
+        Returns:
+            成功发送的连接数
+        """
         if channel == "*":
             # 广播给所有连接
-            for websocket in list(self._connections.keys()):
-                try:
-                    await self.send_json(websocket, data)
-                    sent_count += 1
-                except Exception as e:
-                    logger.error(f"Error broadcasting to websocket: {e}")
-                    disconnected.append(websocket)
+            targets = list(self._connections.keys())
         else:
             # 广播给订阅了指定频道的连接
-            for user_id, channels in list(self._subscriptions.items()):
-                if channel in channels:
-                    for websocket in list(channels[channel]):
-                        try:
-                            await self.send_json(websocket, data)
-                            sent_count += 1
-                        except Exception as e:
-                            logger.error(f"Error broadcasting to channel {channel}: {e}")
-                            disconnected.append(websocket)
-
-        # 清理断开的连接
-        for websocket in disconnected:
-            await self.disconnect(websocket)
+            targets = list(self._channel_index.get(channel, ()))
+        if not targets:
+            return 0
+
+        # 并发发送，总耗时取决于最慢（且有超时上限）的连接
+        results = await asyncio.gather(*(self._send_bounded(websocket, text) for websocket in targets))
+
+        # 关闭并清理发送失败的连接：超时被取消的发送可能留下半帧，连接不能继续使用
+        failed = [websocket for websocket, ok in zip(targets, results, strict=True) if not ok]
+        if failed:
+            await asyncio.gather(*(self._close_quietly(websocket, 1011) for websocket in failed))
+            for websocket in failed:
+                await self.disconnect(websocket)
+        sent_count = sum(results)
 
         if sent_count > 0:
-            logger.debug(f"Broadcasted to {sent_count} connections on channel: {channel}")
+            logger.debug("Broadcasted to {} connections on channel: {}", sent_count, channel)
 
         return sent_count
 
+    async def _send_bounded(self, websocket: WebSocket, text: str) -> bool:
+        """广播用的单连接发送，超时或失败返回 False（由调用方统一断开）"""
+        try:
+            await asyncio.wait_for(websocket.send_text(text), BROADCAST_SEND_TIMEOUT)
+            return True
+        except Exception as e:
+            logger.error(f"Error broadcasting to websocket: {e!r}")
+            return False
+
+    @staticmethod
+    async def _close_quietly(websocket: WebSocket, code: int) -> None:
+        """关闭连接并忽略错误，关闭本身也受 BROADCAST_SEND_TIMEOUT 限制"""
+        try:
+            await asyncio.wait_for(websocket.close(code=code), BROADCAST_SEND_TIMEOUT)
+        except Exception:
+            pass
+
     def subscribe(self, websocket: WebSocket, channel: str) -> bool:
         """
         订阅频道
@@ -188,13 +260,10 @@ class ConnectionManager:
         if websocket not in self._connections:
             return False
 
-        user_id = self._connections[websocket]["user_id"]
-
-        if channel not in self._subscriptions[user_id]:
-            self._subscriptions[user_id][channel] = set()
-
-        self._subscriptions[user_id][channel].add(websocket)
-        logger.debug(f"User {user_id} subscribed to channel: {channel}")
+        state = self._connections[websocket]
+        state.channels.add(channel)
+        self._channel_index.setdefault(channel, set()).add(websocket)
+        logger.debug(f"User {state.user_id} subscribed to channel: {channel}")
         return True
 
     def unsubscribe(self, websocket: WebSocket, channel: str) -> bool:
@@ -208,19 +277,22 @@ class ConnectionManager:
         Returns:
             是否取消成功
         """
-        if websocket not in self._connections:
+        state = self._connections.get(websocket)
+        if state is None or channel not in state.channels:
             return False
 
-        user_id = self._connections[websocket]["user_id"]
-
-        if channel in self._subscriptions.get(user_id, {}):
-            self._subscriptions[user_id][channel].discard(websocket)
-            if not self._subscriptions[user_id][channel]:
-                del self._subscriptions[user_id][channel]
-            logger.debug(f"User {user_id} unsubscribed from channel: {channel}")
-            return True
+        state.channels.discard(channel)
+        self._remove_from_channel(websocket, channel)
+        logger.debug(f"User {state.user_id} unsubscribed from channel: {channel}")
+        return True
 
-        return False
+    def _remove_from_channel(self, websocket: WebSocket, channel: str) -> None:
+        """从频道索引中移除连接，频道无订阅者时删除该频道"""
+        subscribers = self._channel_index.get(channel)
+        if subscribers is not None:
+            subscribers.discard(websocket)
+            if not subscribers:
+                del self._channel_index[channel]
 
     def is_authenticated(self, websocket: WebSocket) -> bool:
         """
@@ -232,7 +304,8 @@ class ConnectionManager:
         Returns:
             是否已认证
         """
-        return self._connections.get(websocket, {}).get("authenticated", False)
+        state = self._connections.get(websocket)
+        return state.authenticated if state is not None else False
 
     def set_authenticated(self, websocket: WebSocket, authenticated: bool) -> None:
         """
@@ -243,17 +316,19 @@ class ConnectionManager:
             authenticated: 是否已认证
         """
         if websocket in self._connections:
-            self._connections[websocket]["authenticated"] = authenticated
+            self._connections[websocket].authenticated = authenticated
 
     def validate_token(self, token: str) -> bool:
         """
         验证 Token
         """
         # 如果服务端没有设置 Token (为空)，则允许任何连接（方便首次配置）
-        if not self._valid_tokens or (len(self._valid_tokens) == 1 and "" in self._valid_tokens):
+        if not self._valid_tokens or self._single_token == b"":
             logger.warning("WebSocket server is running WITHOUT token authentication.")
             return True
-            
+
+        if self._single_token is not None:
+            return hmac.compare_digest(token.encode(), self._single_token)
         return token in self._valid_tokens
 
     def get_connection_id(self, websocket: WebSocket) -> Optional[str]:
@@ -266,9 +341,10 @@ class ConnectionManager:
         Returns:
             连接 ID
         """
-        return self._connections.get(websocket, {}).get("user_id")
+        state = self._connections.get(websocket)
+        return state.user_id if state is not None else None
 
-    def get_connection_info(self, user_id: str) -> Optional[Dict[str, str]]:
+    def get_connection_info(self, user_id: str) -> Optional[Dict[str, Any]]:
         """
         获取连接信息
 
@@ -278,10 +354,8 @@ class ConnectionManager:
         Returns:
             连接信息
         """
-        for websocket, info in self._connections.items():
-            if info.get("user_id") == user_id:
-                return info
-        return None
+        state = self._connections.get(self._user_index.get(user_id))
+        return asdict(state) if state is not None else None
 
     async def handle_auth(self, websocket: WebSocket, message: WSAuthMessage) -> bool:
         """
@@ -299,25 +373,15 @@ class ConnectionManager:
             user_id = self.get_connection_id(websocket)
 
             # 发送认证成功响应
-            ack = WSMessage(
-                type="auth_ack",
-                channel="system",
-                timestamp=int(__import__("time").time()),
-                payload={"user_id": user_id, "status": "authenticated"},
+            await self.send_text(
+                websocket, _AUTH_ACK_TEMPLATE % (int(time.time()), orjson.dumps(user_id).decode())
             )
-            await self.send_json(websocket, ack)
 
             logger.info(f"WebSocket authenticated: {user_id}")
             return True
         else:
             # 认证失败
-            ack = WSMessage(
-                type="error",
-                channel="system",
-                timestamp=int(__import__("time").time()),
-                payload={"error": "Invalid token", "code": 401},
-            )
-            await self.send_json(websocket, ack)
+            await self.send_text(websocket, _AUTH_ERROR_TEMPLATE % int(time.time()))
             return False
 
     async def handle_subscribe(self, websocket: WebSocket, message: WSSubscribeMessage) -> None:
@@ -333,18 +397,27 @@ class ConnectionManager:
             logger.debug(f"Subscribed to channel: {channel}")
 
         # 发送订阅确认
-        ack = WSMessage(
-            type="event",
-            channel="system",
-            timestamp=int(__import__("time").time()),
-            payload={"event": "subscribed", "channels": message.channels},
+        await self.send_text(
+            websocket, _SUBSCRIBED_TEMPLATE % (int(time.time()), orjson.dumps(message.channels).decode())
         )
-        await self.send_json(websocket, ack)
 
     def get_connections_count(self) -> int:
         """获取活跃连接数"""
         return len(self._connections)
 
+    def has_subscribers(self, channel: str) -> bool:
+        """
+        是否存在订阅了指定频道的连接（与 broadcast 的频道匹配规则一致）
+
+        Args:
+            channel: 频道名称
+
+        Returns:
+            是否有订阅者
+        """
+        # 可能从适配器线程调用，单次 dict 查找不会与主循环的修改交错
+        return bool(self._channel_index.get(channel))
+
     def get_subscribers_count(self, channel: str) -> int:
         """
         获取指定频道的订阅者数量
@@ -355,13 +428,15 @@ class ConnectionManager:
         Returns:
             订阅者数量
         """
-        count = 0
-        for user_id, channels in self._subscriptions.items():
-            if channel in channels:
-                count += len(channels[channel])
-            elif "*" in channels:
-                count += len(channels["*"])
-        return count
+        subscribers = self._channel_index.get(channel)
+        wildcard = self._channel_index.get("*") if channel != "*" else None
+        # 常见情况只有一侧有订阅者，直接取集合大小（O(1)）
+        if not wildcard:
+            return len(subscribers) if subscribers else 0
+        if not subscribers:
+            return len(wildcard)
+        # 同时订阅了该频道和 "*" 的连接只计一次
+        return len(subscribers) + sum(1 for websocket in wildcard if websocket not in subscribers)
 
 
 # 全局连接管理器实例
@@ -376,4 +451,4 @@ def get_manager() -> ConnectionManager:
     return _manager
 
 
-__all__ = ["ConnectionManager", "get_manager"]
\ No newline at end of file
+__all__ = ["ConnectionManager", "ConnState", "get_manager"]
\ No newline at end of file
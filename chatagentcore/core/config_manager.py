@@ -1,13 +1,74 @@
 """Configuration manager with YAML support and hot reload"""
 
 import asyncio
-import json
+import hashlib
 import os
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable
+from typing import Any, Callable, Dict, Final, FrozenSet, Iterable, Optional, Tuple
+
 import yaml
 from loguru import logger
-from chatagentcore.api.schemas.config import Settings, PlatformsConfig
+from pydantic import ConfigDict, create_model
+
+from chatagentcore.api.schemas.config import PlatformsConfig, Settings
+
+# 优先使用 libyaml 的 C 解析器/生成器
+try:
+    from yaml import CSafeDumper as _YamlDumper
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeDumper as _YamlDumper
+    from yaml import SafeLoader as _YamlLoader
+
+# 文件变更通知（watchfiles 随 uvicorn[standard] 安装），缺失时回退为 mtime 轮询
+try:
+    from watchfiles import awatch
+    HAS_WATCHFILES = True
+except ImportError:
+    HAS_WATCHFILES = False
+
+# 文件事件合并窗口（毫秒），编辑器保存时的多次写入只触发一次重载
+WATCH_DEBOUNCE_MS: Final = 200
+
+# 与 Settings 字段一致的普通模型。BaseSettings 每次校验都会经过 __init__ 重新读取
+# .env 与环境变量，文件内容改用此模型校验，环境变量只在首次加载时解析一次
+_SettingsFields = create_model(
+    "_SettingsFields",
+    __config__=ConfigDict(extra="forbid", frozen=True),
+    **{name: (field.annotation, field) for name, field in Settings.model_fields.items()},
+)
+_SETTINGS_VALIDATOR: Final = _SettingsFields.__pydantic_validator__
+
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """递归合并字典，override 优先（与 pydantic-settings 合并配置来源的规则一致）"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _changed_keys(old: Dict[str, Any], new: Dict[str, Any]) -> FrozenSet[str]:
+    """比较两份配置，返回变更的顶层键，以及字典配置段中变更的 "段.子键"（如 "platforms.qq"）"""
+    changed = set()
+    for key in old.keys() | new.keys():
+        old_value, new_value = old.get(key), new.get(key)
+        if old_value == new_value:
+            continue
+        changed.add(key)
+        if isinstance(old_value, dict) and isinstance(new_value, dict):
+            changed.update(
+                f"{key}.{sub}" for sub in old_value.keys() | new_value.keys()
+                if old_value.get(sub) != new_value.get(sub)
+            )
+    return frozenset(changed)
+
+
+# 配置变更回调：(新配置, 已变更的键)
+ConfigCallback = Callable[[Settings, FrozenSet[str]], None]
 
 
 class ConfigManager:
@@ -25,10 +86,19 @@ class ConfigManager:
         self.uos_ai_config_path = Path(os.path.expanduser("~/.config/deepin/uos-ai-assistant/chatagentcore.yaml"))
         self.version: int = 0
         self._config: Settings | None = None
+        # self._config.platforms 的直接引用，随配置替换同步更新
+        self._platforms: PlatformsConfig | None = None
         self._raw_config: Dict[str, Any] = {}
+        # 上次成功校验的配置文件内容摘要，内容未变时跳过解析与校验
+        self._last_hash: bytes | None = None
+        # 来自 .env 与 CAC_ 环境变量的配置，首次加载时解析一次
+        self._env_overlay: Dict[str, Any] | None = None
+        # 上次写入 uos-ai 路径的内容，未变化且文件仍在时不再重复写入
+        self._synced_uos_config: Dict[str, Any] | None = None
         self._reload_task: asyncio.Task | None = None
         self._reload_interval: float = 5.0  # 秒
-        self._callbacks: list[Callable[[Settings], None]] = []
+        # (回调, 关注的顶层配置键)，键为 None 表示任意变更都触发
+        self._callbacks: list[Tuple[ConfigCallback, Optional[FrozenSet[str]]]] = []
 
     def load(self) -> Settings:
         """
@@ -41,14 +111,22 @@ class ConfigManager:
         # 2. 加载或创建服务配置
         if not self.config_path.exists():
             logger.warning(f"Config file not found: {self.config_path}, creating default config")
-            self._config = Settings()
-            self._save_to_file(self._config.model_dump())
+            self._config = self._build_settings({})
             self._raw_config = self._config.model_dump()
+            self._save_to_file(self._raw_config)
+            self._last_hash = None
         else:
             logger.info(f"Loading config from: {self.config_path}")
-            with open(self.config_path, "r", encoding="utf-8") as f:
-                self._raw_config = yaml.safe_load(f) or {}
-            self._config = Settings.model_validate(self._raw_config)
+            data = self.config_path.read_bytes()
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            if self._config is None or digest != self._last_hash:
+                self._raw_config = yaml.load(data, Loader=_YamlLoader) or {}
+                self._config = self._build_settings(self._raw_config)
+                self._last_hash = digest
+            else:
+                logger.debug("Config file unchanged, reusing validated settings")
+
+        self._platforms = self._config.platforms
 
         # 3. 强制在 uos-ai 指定路径同步配置文件
         self._sync_to_uos_ai_path()
@@ -63,6 +141,25 @@ class ConfigManager:
         self.version += 1
         return self._config
 
+    def _build_settings(self, raw: Dict[str, Any]) -> Settings:
+        """
+        校验配置内容并构造 Settings（文件内容优先于环境变量）
+
+        Args:
+            raw: 配置文件内容
+
+        Returns:
+            配置对象
+        """
+        if self._env_overlay is None:
+            # 只保留显式来自环境的字段，默认值由校验补齐
+            self._env_overlay = Settings().model_dump(exclude_unset=True)
+        fields = _SETTINGS_VALIDATOR.validate_python(_deep_merge(self._env_overlay, raw))
+        return Settings.model_construct(
+            _fields_set=fields.model_fields_set,
+            **{name: getattr(fields, name) for name in Settings.model_fields},
+        )
+
     def _sync_to_uos_ai_path(self):
         """同步配置到 uos-ai 指定的 ~/.config/... 路径"""
         try:
@@ -78,9 +175,13 @@ class ConfigManager:
                 }
             }
             
+            if uos_config == self._synced_uos_config and self.uos_ai_config_path.exists():
+                return
+
             with open(self.uos_ai_config_path, "w", encoding="utf-8") as f:
-                yaml.dump(uos_config, f, allow_unicode=True, sort_keys=False)
-            
+                yaml.dump(uos_config, f, Dumper=_YamlDumper, allow_unicode=True, sort_keys=False)
+            self._synced_uos_config = uos_config
+
             logger.info(f"已同步配置文件至 uos-ai 路径: {self.uos_ai_config_path}")
         except Exception as e:
             logger.error(f"同步 uos-ai 配置文件失败: {e}")
@@ -89,22 +190,30 @@ class ConfigManager:
         """内部方法：将字典保存到 YAML 文件"""
         try:
             with open(self.config_path, "w", encoding="utf-8") as f:
-                yaml.dump(config_dict, f, allow_unicode=True, sort_keys=False)
+                yaml.dump(config_dict, f, Dumper=_YamlDumper, allow_unicode=True, sort_keys=False)
         except Exception as e:
             logger.error(f"Failed to save config: {e}")
 
     def reload(self) -> Settings:
         """重新加载配置"""
         logger.info("Reloading config...")
-        old_raw = json.dumps(self._raw_config, sort_keys=True)
+        old_hash = self._last_hash
+        old_dump = self._config.model_dump() if self._config else {}
         try:
             self.load()
-            new_raw = json.dumps(self._raw_config, sort_keys=True)
-            if old_raw != new_raw:
-                logger.info("Config content changed, triggering callbacks")
-                for callback in self._callbacks:
-                    try: callback(self._config)
-                    except Exception as e: logger.error(f"Error in config callback: {e}")
+            if old_hash is not None and self._last_hash == old_hash:
+                # 文件内容未变，无需比较与回调
+                return self._config
+            changed = _changed_keys(old_dump, self._config.model_dump())
+            if changed:
+                logger.info(f"Config content changed ({', '.join(sorted(changed))}), triggering callbacks")
+                for callback, keys in self._callbacks:
+                    if keys is not None and keys.isdisjoint(changed):
+                        continue
+                    try:
+                        callback(self._config, changed)
+                    except Exception as e:
+                        logger.error(f"Error in config callback: {e}")
         except Exception as e:
             logger.error(f"Reload failed: {e}")
         return self._config
@@ -112,25 +221,58 @@ class ConfigManager:
     async def watch(self, interval: float = 5.0) -> None:
         self._reload_interval = interval
         self._reload_task = asyncio.create_task(self._watch_loop())
-        logger.info(f"Config watch task started (interval: {interval}s)")
+        if HAS_WATCHFILES:
+            logger.info("Config watch task started (file events)")
+        else:
+            logger.info(f"Config watch task started (interval: {interval}s)")
 
     async def stop_watch(self) -> None:
         if self._reload_task:
             self._reload_task.cancel()
-            try: await self._reload_task
-            except asyncio.CancelledError: pass
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
 
-    def on_change(self, callback: Callable[[Settings], None]) -> None:
-        self._callbacks.append(callback)
+    def on_change(self, callback: ConfigCallback, keys: Optional[Iterable[str]] = None) -> None:
+        """
+        注册配置变更回调
+
+        Args:
+            callback: 回调函数，参数为新配置与已变更的键（顶层键及 "platforms.qq" 形式的二级键）
+            keys: 关注的顶层配置键（如 "platforms"），为 None 时任意变更都会触发
+        """
+        self._callbacks.append((callback, frozenset(keys) if keys is not None else None))
+
+    def apply_overrides(self, section: str, **changes: Any) -> Settings:
+        """
+        在内存中覆盖某个配置段的字段（不写回文件）
+
+        配置模型为只读，这里生成替换后的新 Settings。
+
+        Args:
+            section: 顶层配置段名称，如 "server"、"platforms"
+            **changes: 要覆盖的字段及新值
+
+        Returns:
+            更新后的配置
+        """
+        current = getattr(self.config, section)
+        self._config = self.config.model_copy(update={section: current.model_copy(update=changes)})
+        self._platforms = self._config.platforms
+        return self._config
 
     @property
     def config(self) -> Settings:
-        if self._config is None: raise RuntimeError("Config not loaded.")
+        if self._config is None:
+            raise RuntimeError("Config not loaded.")
         return self._config
 
     @property
     def platforms(self) -> PlatformsConfig:
-        return self.config.platforms
+        if self._platforms is None:
+            raise RuntimeError("Config not loaded.")
+        return self._platforms
 
     def _validate_config(self, config: Settings) -> None:
         enabled_platforms = [n for n, p in [("feishu", config.platforms.feishu), ("wecom", config.platforms.wecom), 
@@ -138,17 +280,44 @@ class ConfigManager:
         logger.info(f"Enabled platforms: {enabled_platforms or 'None'}")
 
     async def _watch_loop(self) -> None:
-        if not self.config_path.exists(): return
+        if not self.config_path.exists():
+            return
+        if HAS_WATCHFILES:
+            await self._watch_events()
+        else:
+            await self._poll_loop()
+
+    async def _watch_events(self) -> None:
+        """监听配置目录的文件事件，仅在配置文件变更时重载（空闲时无唤醒）"""
+        target = self.config_path.resolve()
+        logger.debug(f"Watching config file for changes: {target}")
+        try:
+            async for _ in awatch(
+                target.parent,
+                watch_filter=lambda _change, path: Path(path) == target,
+                debounce=WATCH_DEBOUNCE_MS,
+                recursive=False,
+            ):
+                # 原子保存（先删后建）时文件可能短暂不存在，等待下一次事件
+                if self.config_path.exists():
+                    self.reload()
+        except asyncio.CancelledError:
+            pass
+
+    async def _poll_loop(self) -> None:
+        """按固定间隔检查配置文件 mtime"""
         last_mtime = self.config_path.stat().st_mtime
         try:
             while True:
                 await asyncio.sleep(self._reload_interval)
-                if not self.config_path.exists(): break
+                if not self.config_path.exists():
+                    break
                 current_mtime = self.config_path.stat().st_mtime
                 if current_mtime != last_mtime:
                     self.reload()
                     last_mtime = current_mtime
-        except asyncio.CancelledError: pass
+        except asyncio.CancelledError:
+            pass
 
     def to_dict(self) -> Dict[str, Any]:
         return self._config.model_dump() if self._config else {}
@@ -1,11 +1,16 @@
 """Message router for routing messages to correct adapters"""
 
 import asyncio
-import uuid
-from typing import Dict, Optional
+import itertools
+import os
+from typing import Dict, Final, Optional
 from loguru import logger
 from chatagentcore.core.adapter_manager import AdapterManager, get_adapter_manager
 
+# 消息 ID = 进程随机前缀 + 自增序号，进程重启后前缀不同，ID 不会重复
+_PROCESS_NONCE: Final = os.urandom(4).hex()
+_message_counter = itertools.count(1)
+
 
 class MessageRouter:
     """消息路由器 - 负责将消息路由到正确的适配器"""
@@ -18,7 +23,6 @@ class MessageRouter:
             adapter_manager: 适配器管理器实例
         """
         self.adapter_manager = adapter_manager
-        self._pending_messages: Dict[str, asyncio.Future] = {}
         self._running = False
 
     async def route_outgoing(
@@ -61,7 +65,7 @@ class MessageRouter:
         Returns:
             消息 ID
         """
-        return f"msg_{uuid.uuid4().hex}"
+        return f"msg_{_PROCESS_NONCE}_{next(_message_counter)}"
 
     async def send_and_wait(
         self, platform: str, to: str, message_type: str, content: str, conversation_type: str = "user", timeout: float = 30.0
@@ -83,24 +87,9 @@ class MessageRouter:
         Raises:
             asyncio.TimeoutError: 发送超时
         """
-        message_id = self.create_message_id()
-        future: asyncio.Future[str] = asyncio.Future()
-        self._pending_messages[message_id] = future
-
-        try:
-            # 发送消息
-            result_id = await asyncio.wait_for(
-                self.route_outgoing(platform, to, message_type, content, conversation_type), timeout
-            )
-
-            # 标记为完成
-            future.set_result(result_id)
-            return result_id
-        except Exception as e:
-            future.set_exception(e)
-            raise
-        finally:
-            self._pending_messages.pop(message_id, None)
+        return await asyncio.wait_for(
+            self.route_outgoing(platform, to, message_type, content, conversation_type), timeout
+        )
 
     async def validate_platform_config(self, platform: str, config: Dict) -> bool:
         """
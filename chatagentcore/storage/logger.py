@@ -8,7 +8,7 @@ from loguru import logger as _logger
 class LogConfig:
     """日志配置"""
 
-    def __init__(self, log_dir: str | None = None, level: str = "INFO"):
+    def __init__(self, log_dir: str | Path | None = None, level: str = "INFO"):
         """
         初始化日志配置
 
@@ -5,12 +5,13 @@
 """
 
 import asyncio
+import concurrent.futures
 import json
 import sys
 import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable
+from typing import Dict, Any, Final, Optional, Callable
 from loguru import logger
 from datetime import datetime
 
@@ -20,6 +21,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from chatagentcore.core.config_manager import get_config_manager
 from chatagentcore.adapters.feishu.client import FeishuClientSDK, HAS_WS_CLIENT
 
+# 等待发送结果的超时（秒）
+SEND_TIMEOUT: Final = 30.0
+
 
 class ChatSession:
     """会话状态管理"""
@@ -248,6 +252,15 @@ def run_ws_client(session: ChatSession):
         session.running = False
 
 
+def _wait_future(future: concurrent.futures.Future) -> Any:
+    """等待跨线程 future 的结果，超时后取消任务，避免它在事件循环中继续运行"""
+    try:
+        return future.result(timeout=SEND_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        future.cancel()
+        raise
+
+
 def _run_async_in_loop(coro) -> Any:
     """在共享的事件循环中运行异步任务"""
     if CHAT_SESSION.send_loop is None or CHAT_SESSION.send_loop.is_closed():
@@ -259,7 +272,7 @@ def _run_async_in_loop(coro) -> Any:
     # 在现有事件循环中运行任务
     try:
         future = asyncio.run_coroutine_threadsafe(coro, CHAT_SESSION.send_loop)
-        return future.result(timeout=30)
+        return _wait_future(future)
     except Exception as e:
         logger.error(f"运行异步任务失败: {e}")
         raise
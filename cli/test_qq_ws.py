@@ -5,53 +5,51 @@
 """
 
 import asyncio
+import contextlib
+import os
 import sys
 import threading
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional, Callable
+from typing import Any, Awaitable, Callable, Dict, Final, List, NamedTuple, Optional, Tuple, Union
+
 from loguru import logger
-from datetime import datetime
+
+PROJECT_ROOT: Final = Path(__file__).resolve().parent.parent
+CONFIG_PATH: Final = PROJECT_ROOT / "config" / "config.yaml"
 
 # 添加项目根目录到路径
-sys.path.insert(0, str(Path(__file__).parent.parent))
+sys.path.insert(0, str(PROJECT_ROOT))
+
+from chatagentcore.core.config_manager import get_config_manager  # noqa: E402
 
-from chatagentcore.core.config_manager import get_config_manager
 # Import QQ Adapter related classes
 try:
     import botpy
-    from chatagentcore.adapters.qq.client import QQBotClient, _run_bot_in_thread, Message
+
+    from chatagentcore.adapters.qq.client import (
+        _SEND_DISPATCH,
+        Message,
+        QQBotClient,
+        _run_bot_in_thread,
+    )
     HAS_BOTPY = True
+    _INTENTS: Final = botpy.Intents(public_messages=True, public_guild_messages=True)
 except ImportError:
     HAS_BOTPY = False
 
-class ChatSession:
-    """会话状态管理"""
-
-    def __init__(self):
-        self.client: Optional[QQBotClient] = None
-        self.app_id: str = ""
-        self.token: str = ""
-        
-        self.target_id: Optional[str] = None
-        self.target_type: str = "user" # user, group, guild
-        self.last_msg_id: str = "0"
-        
-        self.last_sender_id: Optional[str] = None
-        self.last_target_type: str = "user"
-        
-        self.message_count = 0
-        self.running = True
-        self.send_loop: Optional[asyncio.AbstractEventLoop] = None
-
-
-# 全局会话实例
-CHAT_SESSION = ChatSession()
-
-
-def print_welcome_banner() -> None:
-    """打印欢迎界面"""
-    banner = """
+# 回复合并（/batch 开启，默认关闭）：连续输入在空闲 REPLY_FLUSH_SEC 秒或攒满
+# REPLY_MAX_BATCH 行后合并为一条发送
+REPLY_MAX_BATCH: Final = 50
+REPLY_FLUSH_SEC: Final = 0.3
+# 启动时等待 Bot 就绪的最长时间（秒）
+READY_WAIT_TIMEOUT: Final = 10.0
+# 退出时等待剩余回复发送完成的最长时间（秒）
+REPLY_DRAIN_TIMEOUT: Final = 10.0
+# 放入回复队列表示立即发送已排队的内容
+_SEND_NOW: Final = object()
+
+_BANNER: Final = """
 ╔════════════════════════════════════════════════════════════╗
 ║            QQ Bot 双向对话工具                             ║
 ║       ChatAgentCore - QQ Interactive Chat                   ║
@@ -66,154 +64,200 @@ def print_welcome_banner() -> None:
 5. 命令:
    /status      - 查看连接状态
    /set <ID> <Type> - 设置回复目标 (Type: user, group, guild)
+   /batch [on|off] - 切换合并发送（连续输入合并为一条消息，默认关闭）
+   /flush       - 立即发送已排队的回复
    /help        - 显示帮助
    /quit        - 退出
 ━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
 """
-    print(banner)
+_HELP_TEXT: Final = "Commands: /status, /set <ID> <Type>, /batch [on|off], /flush, /quit"
+_SEPARATOR: Final = "-" * 60
+_PROMPT: Final = "回复: "
+# 本工具的日志统一带 component 上下文，绑定只在导入时做一次；消息用占位参数，级别被过滤时不做格式化
+log: Final = logger.bind(component="qq_ws")
+PROMPT_BYTES: Final = _PROMPT.encode("utf-8")
+
+
+class SessionSnapshot(NamedTuple):
+    """会话目标快照（不可变，整体替换发布）"""
+
+    target_id: Optional[str] = None
+    target_type: str = "user"  # user, group, guild
+    # 与 target_type 对应的 botpy 发送调用 (api, to, msg_id, content)，设置目标时解析
+    send_fn: Optional[Callable[[Any, str, str, str], Awaitable[Dict[str, Any]]]] = None
+    last_msg_id: str = "0"
+    last_sender_id: Optional[str] = None
+    last_target_type: str = "user"
+
+
+class ChatSession:
+    """会话状态管理"""
+
+    def __init__(self):
+        self.client: Optional[QQBotClient] = None
+        self.app_id: str = ""
+        self.token: str = ""
+
+        # 读方先取一次 snapshot 再只用其字段，写方构造新快照后一次赋值，
+        # 避免读到半更新的目标与消息 ID
+        self.snapshot = SessionSnapshot()
+
+        self.message_count = 0
+        self.running = True
+        # 是否把连续输入合并为一条消息发送（/batch 切换）；关闭时每行单独发送
+        self.batch_replies = False
+        # Bot 就绪（on_ready）或 Bot 线程退出时置位，主线程据此结束启动等待
+        self.ready_event = threading.Event()
+        # 命令行循环结束或 Bot 退出时置位，主线程据此退出
+        self.stopped = threading.Event()
+
+    def set_target(self, target_id: str, target_type: str) -> SessionSnapshot:
+        """设置回复目标，并解析对应的发送调用"""
+        self.snapshot = snap = self.snapshot._replace(
+            target_id=target_id,
+            target_type=target_type,
+            send_fn=_SEND_DISPATCH.get(target_type),
+        )
+        return snap
+
+
+# 全局会话实例
+CHAT_SESSION = ChatSession()
+
+
+def print_welcome_banner() -> None:
+    """打印欢迎界面"""
+    print(_BANNER)
+
+
+def write_prompt(data: bytes = PROMPT_BYTES) -> None:
+    """输出输入提示符
+
+    终端下 stdout 按行缓冲，前面以换行结尾的 print 已经落盘，直接 os.write 即可；
+    重定向到文件/管道时 stdout 为块缓冲，仍走 sys.stdout 以保证输出顺序。
+    """
+    if sys.stdout.isatty():
+        os.write(sys.stdout.fileno(), data)
+    else:
+        sys.stdout.write(data.decode("utf-8"))
+        sys.stdout.flush()
 
 
 def print_message_received(msg: Message):
     """打印接收到的消息"""
-    timestamp = datetime.fromtimestamp(msg.timestamp) if msg.timestamp else datetime.now()
-    sender_name = msg.sender.get("name", "User")
-    sender_id = msg.sender.get("id", "")
-    content = msg.content.get("text", "")
+    ts_str = time.strftime("%H:%M:%S", time.localtime(msg.timestamp or time.time()))
+    sender = msg.sender
     conv_type = msg.conversation.get("type", "unknown")
-    conv_id = msg.conversation.get("id", "")
 
-    print(f"\n[{timestamp.strftime('%H:%M:%S')}] 📨 {sender_name} ({sender_id}) [{conv_type}]:")
-    print("-" * 60)
-    print(content)
-    print("-" * 60)
-    print(f"\n回复: ", end="", flush=True)
+    # 整条输出（含提示符）拼成一个字符串，一次写入并刷新
+    sys.stdout.write(
+        f"\n[{ts_str}] 📨 {sender.get('name', 'User')} ({sender.get('id', '')}) [{conv_type}]:\n"
+        f"{_SEPARATOR}\n{msg.content.get('text', '')}\n{_SEPARATOR}\n\n{_PROMPT}"
+    )
+    sys.stdout.flush()
 
 
 def message_handler(msg: Message):
     """处理接收到的消息"""
     CHAT_SESSION.message_count += 1
-    CHAT_SESSION.last_msg_id = msg.message_id
-    
+
     # 更新会话目标
-    sender_id = msg.sender.get("id")
-    conv_id = msg.conversation.get("id")
-    conv_type = msg.conversation.get("type")
-    
+    conv = msg.conversation
+    conv_type = conv.get("type")
+
     if conv_type == "group":
-        CHAT_SESSION.last_sender_id = conv_id # Reply to group
-        CHAT_SESSION.last_target_type = "group"
+        last_sender_id, last_target_type = conv.get("id"), "group"  # Reply to group
     elif conv_type == "guild":
-        CHAT_SESSION.last_sender_id = conv_id # Reply to channel
-        CHAT_SESSION.last_target_type = "guild"
-    else: # user
-        CHAT_SESSION.last_sender_id = sender_id
-        CHAT_SESSION.last_target_type = "user"
-        
+        last_sender_id, last_target_type = conv.get("id"), "guild"  # Reply to channel
+    else:  # user
+        last_sender_id, last_target_type = msg.sender.get("id"), "user"
+
+    snap = CHAT_SESSION.snapshot._replace(
+        last_msg_id=msg.message_id,
+        last_sender_id=last_sender_id,
+        last_target_type=last_target_type,
+    )
     # 如果没有设置目标，自动锁定当前会话
-    if not CHAT_SESSION.target_id:
-        CHAT_SESSION.target_id = CHAT_SESSION.last_sender_id
-        CHAT_SESSION.target_type = CHAT_SESSION.last_target_type
-        print(f"[系统] 已锁定会话目标: {CHAT_SESSION.target_id} ({CHAT_SESSION.target_type})")
-        
+    locked = not snap.target_id
+    if locked:
+        snap = snap._replace(
+            target_id=last_sender_id,
+            target_type=last_target_type,
+            send_fn=_SEND_DISPATCH.get(last_target_type),
+        )
+    CHAT_SESSION.snapshot = snap
+
+    if locked:
+        print(f"[系统] 已锁定会话目标: {snap.target_id} ({snap.target_type})")
+
     print_message_received(msg)
 
 
+if HAS_BOTPY:
+    class CliBotClient(QQBotClient):
+        """命令行工具使用的 Bot 客户端，就绪时通知主线程"""
+
+        async def on_ready(self):
+            await super().on_ready()
+            CHAT_SESSION.ready_event.set()
+
+
 def run_qq_bot(session: ChatSession):
     """运行 QQ Bot"""
-    # Create a loop for initialization (botpy requires get_event_loop() in __init__)
+    # botpy 在 __init__ 中通过 get_event_loop() 绑定事件循环，先为本线程创建并设置；
+    # 同一个循环随后交给 _run_bot_in_thread 复用并在 Bot 退出时关闭
     loop = asyncio.new_event_loop()
+    # 开启 eager 任务（3.12+）：不挂起即可完成的任务（如回复的参数检查失败路径）
+    # 同步执行，不再经过一次调度；在任何任务创建之前设置
+    if sys.version_info >= (3, 12):
+        loop.set_task_factory(asyncio.eager_task_factory)
     asyncio.set_event_loop(loop)
 
-    intents = botpy.Intents(public_messages=True, public_guild_messages=True)
-    
     # Mock adapter as None since it's not used in critical path of Client
-    session.client = QQBotClient(
-        intents=intents,
+    session.client = CliBotClient(
+        intents=_INTENTS,
         message_handler=message_handler,
         adapter=None
     )
-    
-    # 使用 helper 函数运行在当前线程（这里已经是子线程了）
-    # 但 _run_bot_in_thread 会创建新 loop。
-    # 我们直接调用 _run_bot_in_thread
+
     try:
-        _run_bot_in_thread(session.client, session.app_id, session.token)
+        _run_bot_in_thread(session.client, session.app_id, session.token, loop=loop)
     except Exception as e:
-        logger.error(f"QQ Bot 运行异常: {e}")
+        log.error("QQ Bot 运行异常: {}", e)
         session.running = False
     finally:
-        # Close the init loop
-        try:
-            loop.close()
-        except:
-            pass
-
-
-def _run_async_in_loop(coro) -> Any:
-    """在共享的事件循环中运行异步任务"""
-    if CHAT_SESSION.send_loop is None or CHAT_SESSION.send_loop.is_closed():
-        # 如果 loop 关闭了，我们没法简单重启，因为这是在主线程调用的
-        logger.error("发送循环未运行")
-        return False
-
-    try:
-        future = asyncio.run_coroutine_threadsafe(coro, CHAT_SESSION.send_loop)
-        return future.result(timeout=30)
-    except Exception as e:
-        logger.error(f"运行异步任务失败: {e}")
-        print(f"❌ 发送失败: {e}")
-        return False
+        session.ready_event.set()
+        session.stopped.set()
 
 
 async def send_reply(text: str) -> bool:
-    """发送回复消息"""
-    if not CHAT_SESSION.client or not CHAT_SESSION.client.api or not CHAT_SESSION.client.loop:
+    """发送回复消息（在 Bot 的事件循环中执行）"""
+    session = CHAT_SESSION
+    client = session.client
+    api = client.api if client else None
+    if not api:
         print("❌ 客户端未就绪")
         return False
-        
-    target = CHAT_SESSION.target_id
-    ttype = CHAT_SESSION.target_type
-    
+
+    snap = session.snapshot
+    target = snap.target_id
+    ttype = snap.target_type
+
     if not target:
         print("❌ 未设置回复目标，请先接收消息或使用 /set")
         return False
+
+    send_fn = snap.send_fn
+    if send_fn is None:
+        print(f"❌ 不支持的目标类型: {ttype} (可选: user, group, guild)")
+        return False
         
-    logger.info(f"发送消息到: {target} ({ttype})")
+    log.info("发送消息到: {} ({})", target, ttype)
     
     try:
-        msg_id_to_reply = CHAT_SESSION.last_msg_id
-        
-        async def _do_send():
-            if ttype == "group":
-                res = await CHAT_SESSION.client.api.post_group_message(
-                    group_openid=target,
-                    msg_type=0, 
-                    msg_id=msg_id_to_reply, 
-                    content=text
-                )
-                return res.get("id", "")
-                
-            elif ttype == "user":
-                res = await CHAT_SESSION.client.api.post_c2c_message(
-                    openid=target,
-                    msg_type=0,
-                    msg_id=msg_id_to_reply, 
-                    content=text
-                )
-                return res.get("id", "")
-                
-            elif ttype == "guild":
-                 res = await CHAT_SESSION.client.api.post_message(
-                     channel_id=target,
-                     content=text
-                 )
-                 return res.get("id", "")
-            return ""
-
-        # IMPORTANT: Run the API call on the BOT's loop
-        future = asyncio.run_coroutine_threadsafe(_do_send(), CHAT_SESSION.client.loop)
-        msg_id = await asyncio.wrap_future(future)
-             
+        res = await send_fn(api, target, snap.last_msg_id, text)
+        msg_id = res.get("id", "")
+
         if msg_id:
             print(f"✅ 发送成功")
             return True
@@ -226,6 +270,164 @@ async def send_reply(text: str) -> bool:
         return False
 
 
+async def reply_sender(queue: "asyncio.Queue[Union[str, object]]") -> None:
+    """按顺序发送回复队列中的输入；开启合并时把连续输入合并为一条消息发送"""
+    while True:
+        items: List[Union[str, object]] = [await queue.get()]
+        batch = CHAT_SESSION.batch_replies
+        while batch and items[-1] is not _SEND_NOW and len(items) < REPLY_MAX_BATCH:
+            try:
+                items.append(await asyncio.wait_for(queue.get(), REPLY_FLUSH_SEC))
+            except asyncio.TimeoutError:
+                break
+
+        texts = [item for item in items if item is not _SEND_NOW]
+        try:
+            if batch and texts:
+                await send_reply("\n".join(texts))
+            else:
+                for text in texts:
+                    await send_reply(text)
+        except Exception as e:
+            log.error("发送回复失败: {}", e)
+        finally:
+            for _ in items:
+                queue.task_done()
+
+
+async def flush_replies(queue: "asyncio.Queue[Union[str, object]]") -> None:
+    """立即发送已排队的回复并等待完成"""
+    queue.put_nowait(_SEND_NOW)
+    await queue.join()
+
+
+async def _cmd_quit(_args: str, _replies: "asyncio.Queue[Union[str, object]]") -> bool:
+    return False
+
+
+async def _cmd_status(_args: str, _replies: "asyncio.Queue[Union[str, object]]") -> bool:
+    print(f"消息数: {CHAT_SESSION.message_count}")
+    snap = CHAT_SESSION.snapshot
+    print(f"当前目标: {snap.target_id} ({snap.target_type})")
+    return True
+
+
+async def _cmd_set(args: str, replies: "asyncio.Queue[Union[str, object]]") -> bool:
+    parts = args.split()
+    if len(parts) == 2:
+        # 已排队的回复仍发给原目标
+        await flush_replies(replies)
+        snap = CHAT_SESSION.set_target(parts[0], parts[1])
+        print(f"✅ 目标已更新: {snap.target_id} ({snap.target_type})")
+    else:
+        print("❌ 用法: /set <ID> <Type>")
+    return True
+
+
+async def _cmd_flush(_args: str, replies: "asyncio.Queue[Union[str, object]]") -> bool:
+    # 只提交不等待，发送结果由 reply_sender 打印，输入不被慢请求阻塞
+    replies.put_nowait(_SEND_NOW)
+    return True
+
+
+async def _cmd_batch(args: str, replies: "asyncio.Queue[Union[str, object]]") -> bool:
+    arg = args.strip().lower()
+    if arg in ("", "on", "off"):
+        # 已排队的回复按切换前的方式发送
+        await flush_replies(replies)
+    if arg in ("on", "off"):
+        CHAT_SESSION.batch_replies = arg == "on"
+    elif not arg:
+        CHAT_SESSION.batch_replies = not CHAT_SESSION.batch_replies
+    else:
+        print("❌ 用法: /batch [on|off]")
+        return True
+    print(f"✅ 合并发送: {'开启' if CHAT_SESSION.batch_replies else '关闭'}")
+    return True
+
+
+async def _cmd_help(_args: str, _replies: "asyncio.Queue[Union[str, object]]") -> bool:
+    print(_HELP_TEXT)
+    return True
+
+
+# 命令处理函数 (参数, 回复队列)，返回 False 表示退出命令行循环
+_CommandHandler = Callable[[str, "asyncio.Queue[Union[str, object]]"], Awaitable[bool]]
+
+# 命令名（小写）-> 处理函数
+_COMMANDS: Final[Dict[str, _CommandHandler]] = {
+    "/quit": _cmd_quit,
+    "/exit": _cmd_quit,
+    "quit": _cmd_quit,
+    "exit": _cmd_quit,
+    "/status": _cmd_status,
+    "/set": _cmd_set,
+    "/flush": _cmd_flush,
+    "/batch": _cmd_batch,
+    "/help": _cmd_help,
+}
+
+
+def _parse_command(user_input: str) -> Tuple[Optional[_CommandHandler], str]:
+    """解析输入为 (处理函数, 参数)，非命令返回 (None, "")"""
+    cmd, _, args = user_input.partition(" ")
+    handler = _COMMANDS.get(cmd.lower())
+    return (handler, args) if handler is not None else (None, "")
+
+
+def _stdin_reader(loop: asyncio.AbstractEventLoop, lines: "asyncio.Queue[str]") -> None:
+    """逐行读取 stdin 并投递到事件循环，EOF 时投递空字符串
+
+    运行在守护线程中：Ctrl+C 或 Bot 退出后进程不会因阻塞的 readline 而无法结束。
+    """
+    try:
+        for line in iter(sys.stdin.readline, ""):
+            loop.call_soon_threadsafe(lines.put_nowait, line)
+        loop.call_soon_threadsafe(lines.put_nowait, "")
+    except RuntimeError:
+        # 事件循环已关闭
+        pass
+
+
+async def cli_loop() -> None:
+    """命令行交互循环（运行在 Bot 的事件循环中，stdin 由守护线程读取）"""
+    loop = asyncio.get_running_loop()
+    replies: "asyncio.Queue[Union[str, object]]" = asyncio.Queue()
+    sender = loop.create_task(reply_sender(replies))
+    lines: "asyncio.Queue[str]" = asyncio.Queue()
+    threading.Thread(target=_stdin_reader, args=(loop, lines), daemon=True, name="StdinReader").start()
+    write_prompt()
+    try:
+        while CHAT_SESSION.running:
+            line = await lines.get()
+            if not line:
+                # EOF
+                break
+            user_input = line.strip()
+
+            if not user_input:
+                continue
+
+            # 只对首个词做一次查表，普通聊天文本不再整体转小写和逐个比较
+            handler, args = _parse_command(user_input)
+            if handler is None:
+                replies.put_nowait(user_input)
+            elif not await handler(args, replies):
+                break
+
+            write_prompt()
+        # 退出前发送剩余回复；Bot 卡住时不无限等待
+        try:
+            await asyncio.wait_for(flush_replies(replies), REPLY_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            log.warning("剩余回复未能在超时前发送完成")
+    except Exception as e:
+        log.error("命令行循环异常: {}", e)
+    finally:
+        sender.cancel()
+        CHAT_SESSION.stopped.set()
+
+
 def main():
     print_welcome_banner()
     
@@ -235,83 +437,47 @@ def main():
 
     # 加载配置
     config_manager = get_config_manager()
-    config_path = Path(__file__).parent.parent / "config" / "config.yaml"
-    
-    if not config_path.exists():
-        print(f"❌ 配置文件不存在: {config_path}")
+    if not CONFIG_PATH.exists():
+        print(f"❌ 配置文件不存在: {CONFIG_PATH}")
         return
-        
-    config_manager.config_path = config_path
+
+    config_manager.config_path = CONFIG_PATH
     config_manager.load()
-    
-    qq_config = config_manager.config.platforms.qq
-    if not qq_config.enabled:
+
+    qq = config_manager.platforms.qq
+    if not qq.enabled:
         print("❌ QQ 平台未在配置中启用")
         return
-        
-    CHAT_SESSION.app_id = qq_config.app_id
-    CHAT_SESSION.token = qq_config.token
+
+    CHAT_SESSION.app_id = qq.app_id
+    CHAT_SESSION.token = qq.token
     
     if not CHAT_SESSION.app_id or not CHAT_SESSION.token:
         print("❌ 配置中缺少 app_id 或 token")
         return
 
-    # 初始化发送循环
-    send_loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(send_loop)
-    CHAT_SESSION.send_loop = send_loop
-
-    def run_event_loop():
-        asyncio.set_event_loop(send_loop)
-        asyncio.run(send_loop.run_forever())
-
-    loop_thread = threading.Thread(target=run_event_loop, daemon=True)
-    loop_thread.start()
-    
     # 启动 QQ Bot 线程
     bot_thread = threading.Thread(target=run_qq_bot, args=(CHAT_SESSION,), daemon=True)
     bot_thread.start()
     
     print("⏳ 正在启动 QQ Bot...")
-    time.sleep(2)
-    print("✅ 后台线程已启动 (请关注日志输出确认连接成功)")
-    print("回复: ", end="", flush=True)
+    ready = CHAT_SESSION.ready_event.wait(READY_WAIT_TIMEOUT)
+
+    client = CHAT_SESSION.client
+    if not client or not client.loop or not client.loop.is_running():
+        print("❌ Bot 事件循环未运行")
+        return
+
+    if ready:
+        print("✅ QQ Bot 已就绪")
+    else:
+        print("⚠️ 等待 Bot 就绪超时，继续运行 (请关注日志输出确认连接成功)")
+
+    # 命令行循环与 Bot 共用同一个事件循环，回复直接 await，无需跨线程
+    asyncio.run_coroutine_threadsafe(cli_loop(), client.loop)
+    with contextlib.suppress(KeyboardInterrupt):
+        CHAT_SESSION.stopped.wait()
 
-    # 主循环
-    while CHAT_SESSION.running:
-        try:
-            user_input = input().strip()
-            
-            if not user_input:
-                continue
-                
-            if user_input.lower() in ("/quit", "/exit", "quit", "exit"):
-                break
-                
-            if user_input.lower() == "/status":
-                print(f"消息数: {CHAT_SESSION.message_count}")
-                print(f"当前目标: {CHAT_SESSION.target_id} ({CHAT_SESSION.target_type})")
-                
-            elif user_input.startswith("/set"):
-                parts = user_input.split()
-                if len(parts) == 3:
-                    CHAT_SESSION.target_id = parts[1]
-                    CHAT_SESSION.target_type = parts[2]
-                    print(f"✅ 目标已更新: {CHAT_SESSION.target_id} ({CHAT_SESSION.target_type})")
-                else:
-                    print("❌ 用法: /set <ID> <Type>")
-            
-            elif user_input == "/help":
-                print("Commands: /status, /set <ID> <Type>, /quit")
-                
-            else:
-                _run_async_in_loop(send_reply(user_input))
-                
-            print("回复: ", end="", flush=True)
-            
-        except (KeyboardInterrupt, EOFError):
-            break
-            
     print("再见!")
 
 if __name__ == "__main__":
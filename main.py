@@ -50,15 +50,17 @@ def main():
         sys.exit(1)
 
     # 命令行参数覆盖配置文件设置，确保全局一致（例如同步到 uos-ai 的配置）
+    overrides = {}
     if args.host:
-        config_manager.config.server.host = args.host
+        overrides["host"] = args.host
     if args.port:
-        config_manager.config.server.port = args.port
+        overrides["port"] = args.port
     if args.debug:
-        config_manager.config.server.debug = True
+        overrides["debug"] = True
 
     # 如果有参数覆盖，重新同步一次配置到 uos-ai 路径
-    if args.host or args.port or args.debug:
+    if overrides:
+        config_manager.apply_overrides("server", **overrides)
         config_manager._sync_to_uos_ai_path()
 
     # 确定最终运行参数
@@ -1,6 +1,7 @@
 """Unit tests for ConfigManager"""
 
 import pytest
+import asyncio
 import tempfile
 import yaml
 from pathlib import Path
@@ -72,3 +73,104 @@ def test_config_manager_to_dict(temp_config_file: Path):
     assert "auth" in config_dict
     assert "platforms" in config_dict
     assert config_dict["server"]["host"] == "localhost"
+
+
+def test_config_manager_reload_unchanged_reuses_settings(temp_config_file: Path):
+    """测试配置文件内容未变时重载复用已校验的配置"""
+    manager = ConfigManager(str(temp_config_file))
+    config1 = manager.load()
+
+    assert manager.reload() is config1
+
+    data = yaml.safe_load(temp_config_file.read_text())
+    data["server"]["port"] = 9001
+    temp_config_file.write_text(yaml.dump(data))
+
+    config2 = manager.reload()
+    assert config2 is not config1
+    assert config2.server.port == 9001
+
+
+async def test_config_manager_watch_reloads_on_change(temp_config_file: Path):
+    """测试监听到配置文件修改后自动重载"""
+    manager = ConfigManager(str(temp_config_file))
+    manager.load()
+    changed = asyncio.Event()
+    manager.on_change(lambda settings, keys: changed.set())
+
+    await manager.watch(interval=0.1)
+    await asyncio.sleep(0.2)
+    data = yaml.safe_load(temp_config_file.read_text())
+    data["server"]["port"] = 9002
+    temp_config_file.write_text(yaml.dump(data))
+
+    try:
+        await asyncio.wait_for(changed.wait(), timeout=5)
+    finally:
+        await manager.stop_watch()
+    assert manager.config.server.port == 9002
+
+
+def test_config_manager_callbacks_filtered_by_changed_keys(temp_config_file: Path):
+    """测试只触发关注了已变更配置段的回调"""
+    manager = ConfigManager(str(temp_config_file))
+    manager.load()
+    calls = []
+    manager.on_change(lambda settings, changed: calls.append("any"))
+    manager.on_change(lambda settings, changed: calls.append("platforms"), keys={"platforms"})
+    manager.on_change(lambda settings, changed: calls.append("server"), keys={"server"})
+
+    manager.reload()
+    assert calls == []
+
+    data = yaml.safe_load(temp_config_file.read_text())
+    data["server"]["port"] = 9003
+    temp_config_file.write_text(yaml.dump(data))
+    manager.reload()
+
+    assert calls == ["any", "server"]
+
+
+def test_config_manager_callbacks_receive_changed_platforms(temp_config_file: Path):
+    """测试回调收到变更的平台配置段，未变更的平台不在其中"""
+    manager = ConfigManager(str(temp_config_file))
+    manager.load()
+    received = []
+    manager.on_change(lambda settings, changed: received.append(changed), keys={"platforms"})
+
+    data = yaml.safe_load(temp_config_file.read_text())
+    data.setdefault("platforms", {}).setdefault("qq", {})["enabled"] = True
+    temp_config_file.write_text(yaml.dump(data))
+    manager.reload()
+
+    assert len(received) == 1
+    assert {"platforms", "platforms.qq"} <= received[0]
+    assert "platforms.feishu" not in received[0]
+
+
+def test_config_manager_apply_overrides(temp_config_file: Path):
+    """测试配置只读，覆盖时生成新的配置对象"""
+    manager = ConfigManager(str(temp_config_file))
+    config = manager.load()
+
+    with pytest.raises(ValueError):
+        config.server.port = 1
+
+    updated = manager.apply_overrides("server", port=1234)
+
+    assert updated is manager.config
+    assert updated.server.port == 1234
+    assert updated.server.host == "localhost"
+    assert config.server.port == 9000
+
+
+def test_config_manager_platforms_follow_overrides(temp_config_file: Path):
+    """测试 platforms 属性随配置替换同步更新"""
+    manager = ConfigManager(str(temp_config_file))
+    manager.load()
+
+    qq = manager.platforms.qq.model_copy(update={"enabled": True, "app_id": "1", "token": "t"})
+    manager.apply_overrides("platforms", qq=qq)
+
+    assert manager.platforms is manager.config.platforms
+    assert manager.platforms.qq.enabled is True
@@ -0,0 +1,152 @@
+"""Unit tests for FeishuAdapter event dispatch"""
+
+import asyncio
+import json
+import threading
+from chatagentcore.adapters.feishu import FeishuAdapter, EVENT_QUEUE_MAXSIZE
+
+
+def _make_event(message_id: str, text: str) -> dict:
+    return {
+        "header": {"event_type": "im.message.receive_v1", "create_time": "1700000000"},
+        "event": {
+            "sender": {"sender_id": {"open_id": "ou_1"}, "sender_type": "user"},
+            "message": {
+                "message_id": message_id,
+                "chat_id": "oc_1",
+                "chat_type": "group",
+                "message_type": "text",
+                "content": json.dumps({"text": text}),
+            },
+        },
+    }
+
+
+def _start_consumer(adapter: FeishuAdapter) -> None:
+    adapter._loop = asyncio.get_running_loop()
+    adapter._event_queue = asyncio.Queue(maxsize=EVENT_QUEUE_MAXSIZE)
+    adapter._consumer_task = asyncio.create_task(adapter._event_consumer())
+
+
+def test_parse_message_from_event():
+    """测试飞书事件解析为标准消息"""
+    adapter = FeishuAdapter({"app_id": "cli_test", "app_secret": "secret"})
+
+    message = adapter._parse_message_from_event(_make_event("om_1", "hello"))
+
+    assert message.message_id == "om_1"
+    assert message.sender["id"] == "ou_1"
+    assert message.conversation == {"id": "oc_1", "type": "group"}
+    assert message.content["text"] == "hello"
+    assert message.timestamp == 1700000000000
+
+
+def test_parse_message_content_shapes():
+    """测试不同形式的 content：JSON 字符串、普通字符串、dict 以及其他类型"""
+    adapter = FeishuAdapter({"app_id": "cli_test", "app_secret": "secret"})
+    event = _make_event("om_1", "hello")
+    message_obj = event["event"]["message"]
+
+    cases = [
+        ('{"text": "hi"}', {"text": "hi"}),
+        ("not json", {"text": "not json"}),
+        ({"text": "raw"}, {"text": "raw"}),
+        (["a", "b"], {}),
+        (42, {}),
+        # 超过 64 位的整数保持精度
+        ('{"file_id": 123456789012345678901234567890}', {"file_id": 123456789012345678901234567890}),
+    ]
+    for content, expected in cases:
+        message_obj["content"] = content
+        assert adapter._parse_message_from_event(event).content["data"] == expected
+
+
+async def test_ws_event_dispatched_to_main_loop():
+    """测试 SDK 线程收到的事件在主事件循环中处理"""
+    adapter = FeishuAdapter({"app_id": "cli_test", "app_secret": "secret"})
+    _start_consumer(adapter)
+
+    received = []
+    adapter.set_message_handler(
+        lambda message: received.append((message.message_id, threading.current_thread()))
+    )
+
+    payload = json.dumps(_make_event("om_1", "hello")).encode()
+    thread = threading.Thread(target=adapter._handle_ws_message_event, args=(payload,))
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0.05)
+
+    assert received == [("om_1", threading.current_thread())]
+
+    await adapter.shutdown()
+
+
+async def test_consumer_handles_queued_batch():
+    """测试消费者批量处理已排队的事件，单个处理器异常不影响其他事件"""
+    adapter = FeishuAdapter({"app_id": "cli_test", "app_secret": "secret"})
+    _start_consumer(adapter)
+
+    handled = []
+
+    async def handler(event_data):
+        if event_data == "bad":
+            raise ValueError("boom")
+        handled.append(event_data)
+
+    for item in ("a", "bad", "b", "c"):
+        adapter._dispatch_event(handler, item)
+    await asyncio.sleep(0.05)
+
+    assert handled == ["a", "b", "c"]
+
+    await adapter.shutdown()
+
+
+async def test_slow_handler_does_not_block_later_events():
+    """测试慢处理器不阻塞之后到达的事件"""
+    adapter = FeishuAdapter({"app_id": "cli_test", "app_secret": "secret"})
+    _start_consumer(adapter)
+
+    release = asyncio.Event()
+    handled = []
+
+    async def handler(event_data):
+        if event_data == "slow":
+            await release.wait()
+        handled.append(event_data)
+
+    adapter._dispatch_event(handler, "slow")
+    await asyncio.sleep(0.01)
+    adapter._dispatch_event(handler, "fast")
+    await asyncio.sleep(0.05)
+
+    assert handled == ["fast"]
+    release.set()
+    await asyncio.sleep(0.01)
+    assert handled == ["fast", "slow"]
+
+    await adapter.shutdown()
+
+
+async def test_ws_event_with_coroutine_handler():
+    """测试协程处理器经事件队列在主事件循环中处理"""
+    adapter = FeishuAdapter({"app_id": "cli_test", "app_secret": "secret"})
+    _start_consumer(adapter)
+
+    received = []
+
+    async def handler(message):
+        received.append((message.content["text"], threading.current_thread()))
+
+    adapter.set_message_handler(handler)
+
+    payload = json.dumps(_make_event("om_1", "hello")).encode()
+    thread = threading.Thread(target=adapter._handle_ws_at_message_event, args=(payload,))
+    thread.start()
+    thread.join()
+    await asyncio.sleep(0.05)
+
+    assert received == [("[群 @] hello", threading.current_thread())]
+
+    await adapter.shutdown()
@@ -0,0 +1,91 @@
+"""Unit tests for QQAdapter sends and bot hosting"""
+
+import asyncio
+from types import SimpleNamespace
+
+from chatagentcore.adapters.qq import client as client_module
+from chatagentcore.adapters.qq.client import QQAdapter
+
+
+class FakeApi:
+    """记录发送调用的 botpy API 替身"""
+
+    def __init__(self):
+        self.sent: list[str] = []
+
+    async def post_c2c_message(self, openid, msg_type, msg_id, content):
+        self.sent.append(content)
+        return {"id": f"id_{len(self.sent)}"}
+
+
+async def test_send_calls_api_on_main_loop():
+    """测试发送直接在主循环上调用 API 并返回消息 ID"""
+    api = FakeApi()
+    adapter = QQAdapter({"app_id": "app", "token": "secret"})
+    adapter.client = SimpleNamespace(api=api, loop=asyncio.get_running_loop())
+
+    results = await asyncio.gather(
+        *(adapter.send_message("u1", "text", f"hi {i}", "user") for i in range(3))
+    )
+
+    assert results == ["id_1", "id_2", "id_3"]
+    assert api.sent == ["hi 0", "hi 1", "hi 2"]
+
+
+class FakeBotClient:
+    """模拟 botpy 在返回会话协程前安装全局异常处理器"""
+
+    def __init__(self, runs: int = 1):
+        self.closed = False
+        self.handler_during_session = None
+        self.runs = runs
+        self.logins = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    async def start(self, appid, secret, ret_coro=False):
+        self.logins += 1
+        asyncio.get_running_loop().set_exception_handler(lambda loop, context: loop.stop())
+        return self._sessions()
+
+    async def _sessions(self):
+        self.handler_during_session = asyncio.get_running_loop().get_exception_handler()
+        self.closed = self.logins >= self.runs
+
+
+async def test_main_loop_mode_keeps_app_exception_handler():
+    """测试主循环模式下 botpy 的全局异常处理器不会在会话运行期间生效"""
+    loop = asyncio.get_running_loop()
+    previous = loop.get_exception_handler()
+
+    def app_handler(loop, context):
+        pass
+
+    loop.set_exception_handler(app_handler)
+    try:
+        adapter = QQAdapter({"app_id": "app", "token": "secret"})
+        adapter.client = FakeBotClient()
+        await adapter._run_bot()
+
+        assert adapter.client.handler_during_session is app_handler
+        assert loop.get_exception_handler() is app_handler
+    finally:
+        loop.set_exception_handler(previous)
+
+
+async def test_main_loop_mode_logs_in_again_after_sessions_end(monkeypatch):
+    """测试会话全部结束后（客户端未关闭）重新登录"""
+    monkeypatch.setattr(client_module, "RECONNECT_DELAY", 0.0)
+    adapter = QQAdapter({"app_id": "app", "token": "secret"})
+    adapter.client = FakeBotClient(runs=3)
+
+    await asyncio.wait_for(adapter._run_bot(), timeout=1)
+
+    assert adapter.client.logins == 3
@@ -0,0 +1,203 @@
+"""Unit tests for WebSocket ConnectionManager"""
+
+import asyncio
+import json
+from chatagentcore.api.models.message import WSMessage
+from chatagentcore.api.websocket import manager as manager_module
+from chatagentcore.api.websocket.manager import ConnectionManager
+
+
+class FakeWebSocket:
+    """记录发送内容的 WebSocket 替身"""
+
+    def __init__(self):
+        self.sent: list[str] = []
+        self.closed = False
+
+    async def accept(self):
+        pass
+
+    async def send_text(self, text: str):
+        if self.closed:
+            raise RuntimeError("closed")
+        self.sent.append(text)
+
+    async def close(self, code: int = 1000):
+        self.closed = True
+
+
+async def test_broadcast_to_channel_subscribers():
+    """测试频道广播只发送给订阅者，且内容为同一份 JSON"""
+    manager = ConnectionManager()
+    ws1, ws2, ws3 = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for ws in (ws1, ws2, ws3):
+        await manager.connect(ws)
+    manager.subscribe(ws1, "messages")
+    manager.subscribe(ws2, "messages")
+
+    msg = WSMessage(type="message", channel="messages", timestamp=1, payload={"text": "你好"})
+    sent = await manager.broadcast(msg, channel="messages")
+
+    assert sent == 2
+    assert ws1.sent == ws2.sent
+    assert ws3.sent == []
+    assert json.loads(ws1.sent[0])["payload"] == {"text": "你好"}
+
+
+async def test_broadcast_counts_only_successful_sends():
+    """测试广播只统计发送成功的连接，失败连接被移除"""
+    manager = ConnectionManager()
+    ok, broken = FakeWebSocket(), FakeWebSocket()
+    for ws in (ok, broken):
+        await manager.connect(ws)
+        manager.subscribe(ws, "messages")
+    broken.closed = True
+
+    sent = await manager.broadcast_text("{}", channel="messages")
+
+    assert sent == 1
+    assert manager.get_connections_count() == 1
+
+
+async def test_broadcast_slow_client_times_out(monkeypatch):
+    """测试慢客户端超时后被移除，不阻塞其他订阅者"""
+    monkeypatch.setattr(manager_module, "BROADCAST_SEND_TIMEOUT", 0.05)
+
+    class SlowWebSocket(FakeWebSocket):
+        async def send_text(self, text: str):
+            await asyncio.sleep(10)
+
+    manager = ConnectionManager()
+    slow, fast = SlowWebSocket(), FakeWebSocket()
+    for ws in (slow, fast):
+        await manager.connect(ws)
+        manager.subscribe(ws, "messages")
+
+    sent = await asyncio.wait_for(manager.broadcast_text("{}", channel="messages"), timeout=1)
+
+    assert sent == 1
+    assert fast.sent == ["{}"]
+    assert manager.get_connections_count() == 1
+    assert slow.closed
+    assert not fast.closed
+
+
+async def test_send_json_fills_missing_timestamp():
+    """测试发送时补全缺失的时间戳"""
+    manager = ConnectionManager()
+    ws = FakeWebSocket()
+    await manager.connect(ws)
+
+    await manager.send_json(ws, WSMessage(type="event", timestamp=0))
+
+    assert json.loads(ws.sent[0])["timestamp"] > 0
+
+
+async def test_send_failure_disconnects():
+    """测试发送失败时移除连接"""
+    manager = ConnectionManager()
+    ws = FakeWebSocket()
+    await manager.connect(ws)
+    ws.closed = True
+
+    await manager.send_text(ws, "{}")
+
+    assert manager.get_connections_count() == 0
+
+
+async def test_get_connection_info():
+    """测试按用户 ID 查询连接信息"""
+    manager = ConnectionManager()
+    ws = FakeWebSocket()
+    user_id = await manager.connect(ws)
+
+    assert manager.get_connection_info(user_id)["user_id"] == user_id
+
+    await manager.disconnect(ws)
+    assert manager.get_connection_info(user_id) is None
+
+
+async def test_has_subscribers():
+    """测试频道订阅者判断"""
+    manager = ConnectionManager()
+    ws = FakeWebSocket()
+    await manager.connect(ws)
+
+    assert not manager.has_subscribers("messages")
+    manager.subscribe(ws, "messages")
+    assert manager.has_subscribers("messages")
+    manager.unsubscribe(ws, "messages")
+    assert not manager.has_subscribers("messages")
+
+
+async def test_subscribers_count_and_disconnect_cleanup():
+    """测试订阅者计数（含通配订阅）及断开后索引清理"""
+    manager = ConnectionManager()
+    ws1, ws2, ws3 = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    for ws in (ws1, ws2, ws3):
+        await manager.connect(ws)
+    manager.subscribe(ws1, "messages")
+    manager.subscribe(ws2, "*")
+    manager.subscribe(ws3, "messages")
+    manager.subscribe(ws3, "*")
+
+    assert manager.get_subscribers_count("messages") == 3
+    assert manager.get_subscribers_count("events") == 2
+
+    await manager.disconnect(ws3)
+    await manager.disconnect(ws1)
+
+    assert manager.get_subscribers_count("messages") == 1
+    assert not manager.has_subscribers("messages")
+    assert await manager.broadcast_text("{}", channel="messages") == 0
+
+
+async def test_prune_stale_connections():
+    """测试清理超时未活跃的连接"""
+    manager = ConnectionManager()
+    stale, fresh = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(stale)
+    await manager.connect(fresh)
+    manager._connections[stale].last_seen -= 120
+
+    assert await manager.prune_stale_connections(timeout=60.0) == 1
+    assert stale.closed
+    assert manager.get_connections_count() == 1
+
+
+def test_validate_token():
+    """测试 Token 校验（单 Token、多 Token 及未配置 Token）"""
+    manager = ConnectionManager()
+    assert manager.validate_token("anything")
+
+    manager.set_valid_tokens(["secret"])
+    assert manager.validate_token("secret")
+    assert not manager.validate_token("secreT")
+    assert not manager.validate_token("")
+
+    manager.set_valid_tokens(["a", "b"])
+    assert manager.validate_token("b")
+    assert not manager.validate_token("c")
+
+    manager.set_valid_tokens([""])
+    assert manager.validate_token("anything")
+
+
+async def test_ack_templates_match_wsmessage():
+    """测试预格式化的确认消息与 WSMessage 序列化结果一致"""
+    from chatagentcore.api.models.message import WSAuthMessage, WSSubscribeMessage
+
+    manager = ConnectionManager()
+    manager.set_valid_tokens(["secret"])
+    ws = FakeWebSocket()
+    user_id = await manager.connect(ws)
+
+    await manager.handle_auth(ws, WSAuthMessage(token="wrong"))
+    await manager.handle_auth(ws, WSAuthMessage(token="secret"))
+    await manager.handle_subscribe(ws, WSSubscribeMessage(channels=['a"b', "消息"]))
+
+    error, auth_ack, subscribed = (WSMessage.model_validate_json(text) for text in ws.sent)
+    assert error.type == "error" and error.payload == {"error": "Invalid token", "code": 401}
+    assert auth_ack.payload == {"user_id": user_id, "status": "authenticated"}
+    assert subscribed.payload == {"event": "subscribed", "channels": ['a"b', "消息"]}
+    assert json.loads(ws.sent[1]) == json.loads(auth_ack.model_dump_json())